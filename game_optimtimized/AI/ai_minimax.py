@@ -1,114 +1,385 @@
-from game_optimized.AI.eval_impossible import evaluate_impossible
+import math
+from game_optimized.AI.eval_impossible import evaluate_impossible, WIN_SCORE
+from game_optimized.AI import tablebase
+from game_optimized.AI.iterative import SearchLimits, iterative_deepening
+from game_optimized.AI.search_stats import SearchStats, record
+from game_optimized.AI.opening_book import default_book
+from game_optimized.AI.transposition import (TranspositionTable, EXACT, LOWER, UPPER,
+                                             encode_move, decode_move)
+from game_optimized.main_files.zobrist import compute_hash, SEARCHER_KEYS
+from game_optimized.main_files.board import LAIRS, IS_TRAP
+from game_optimized.main_files.config import BOARD_COLS
 
-# Tabela de transposição para memoização
-transposition_table = {}
+# Tamanho da tabela de transposição em MB (fixo: a memória não cresce de jogo para jogo)
+TT_SIZE_MB = 16
+
+# Tabela de transposição, indexada pela chave Zobrist do estado e do jogador que pesquisa.
+# Cada entrada guarda profundidade, tipo de limite (exato/inferior/superior), melhor jogada e idade;
+# a melhor jogada é tentada primeiro na iteração seguinte do aprofundamento iterativo.
+transposition_table = TranspositionTable(TT_SIZE_MB)
+
+# Ordenação das jogadas sem clonar nem avaliar: jogadas "killer" (duas por ply, jogadas
+# calmas que provocaram um corte) e tabela de história (por casa de partida/chegada)
+MAX_PLY = 64
+killer_moves = [[None, None] for _ in range(MAX_PLY)]
+history = [0] * 4096
+
+# Pesquisa de quiescência nas folhas: só capturas e entradas na toca/armadilhas inimigas,
+# com "stand pat" (o jogador pode parar e ficar com a avaliação estática)
+QUIESCENCE = True
+MAX_QUIESCENCE_DEPTH = 6
+
+# Variantes da pesquisa, ligáveis uma a uma para comparação:
+# - PVS: depois da primeira jogada, as outras são testadas com uma janela nula e só se
+#   pesquisam de novo com a janela completa se a melhorarem. Os valores são reais, por isso
+#   a janela nula é (alpha, o real seguinte a alpha): não há valores estritamente no meio.
+# - Janelas de aspiração: no aprofundamento iterativo, cada iteração começa com uma janela
+#   de ASPIRATION_WINDOW à volta do valor da anterior e repete com a janela completa se falhar.
+# - LMR: as jogadas calmas tardias (a partir da LMR_MIN_MOVES-ésima, com profundidade
+#   >= LMR_MIN_DEPTH) são pesquisadas primeiro com menos um nível de profundidade.
+USE_PVS = True
+USE_ASPIRATION = True
+ASPIRATION_WINDOW = 200.0
+USE_LMR = True
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3
+
+# Contadores da pesquisa em curso (nós, avaliações, tabela, cortes; novos em cada new_search)
+stats = SearchStats("ai_minimax")
+
+# Livro de aberturas (opening_book.BOOK_PATH, se existir): consultado antes de pesquisar
+USE_BOOK = True
+
+# Tabelas de finais (tablebase.TABLE_DIR): com poucos animais, o valor exato substitui a pesquisa
+USE_TABLEBASES = True
+
+# Orçamento de tempo/nós da pesquisa em curso (None: sem limite)
+search_limits = None
+
+# Modo de depuração: confere a chave incremental com um recálculo completo em cada nó (lento)
+DEBUG_HASH = False
 
 def get_state_key(game):
     """
-    Gera uma chave única para o estado do jogo baseada no turno, vencedor e nas peças.
+    Devolve a chave Zobrist do estado (peças, turno e vencedor), mantida incrementalmente pelo Game.
     """
-    pieces_state = tuple(sorted((p.name, p.x, p.y, p.player) for p in game.pieces))
-    return (game.turn, game.winner, pieces_state)
+    key = game.hash
+    if DEBUG_HASH:
+        assert key == compute_hash(game), "Chave Zobrist incremental diferente da recalculada"
+    return key
 
-def get_piece_in_clone(cloned_game, original_piece):
+def get_ordered_moves(game, tt_move=None, ply=0):
     """
-    Busca na cópia do jogo a peça correspondente à peça original, utilizando nome, jogador e posição.
+    Retorna uma lista ordenada dos movimentos válidos do jogador a jogar, sem avaliar posições:
+    primeiro a jogada da tabela de transposição (tt_move), depois a entrada na toca inimiga,
+    as capturas (vítima mais valiosa, atacante menos valioso), as entradas nas armadilhas
+    inimigas, as jogadas killer deste ply e por fim as restantes pela tabela de história.
     """
-    for p in cloned_game.pieces:
-        if p.name == original_piece.name and p.player == original_piece.player and p.x == original_piece.x and p.y == original_piece.y:
-            return p
-    return None
+    board = game.board
+    turn = game.turn
+    lair_x, lair_y = LAIRS[3 - turn]
+    lair = lair_y * BOARD_COLS + lair_x
+    enemy_traps = IS_TRAP[3 - turn]
+    tt_code = encode_move(tt_move)
+    killers = killer_moves[ply] if ply < MAX_PLY else ()
+
+    def move_score(move):
+        piece, x, y = move
+        to = y * BOARD_COLS + x
+        code = (piece.y * BOARD_COLS + piece.x) << 6 | to
+        if code == tt_code:
+            return 1 << 40
+        if to == lair:
+            return 1 << 39
+        victim = board[to]
+        if victim is not None:
+            return (1 << 38) + victim.kind * 16 - piece.kind
+        if enemy_traps[to]:
+            return 1 << 37
+        if code in killers:
+            return (1 << 36) + (code == killers[0])
+        return history[code]
 
-def get_ordered_moves(game, player):
+    # cópia ordenada: a lista em cache do Game não pode ser reordenada
+    return sorted(game.legal_moves(), key=move_score, reverse=True)
+
+def tactical_moves(game):
     """
-    Retorna uma lista ordenada de movimentos válidos para o jogador,
-    priorizando os movimentos que levam a estados com melhor avaliação.
+    Jogadas que mudam o material ou ameaçam a vitória: entrada na toca inimiga,
+    capturas (vítima mais valiosa, atacante menos valioso) e entradas nas armadilhas inimigas.
     """
-    moves = []
-    for piece in game.pieces:
-        if piece.player == player:
-            for (nx, ny) in game.get_valid_moves(piece):
-                moves.append((piece, nx, ny))
-    
-    def move_score(move):
-        piece, nx, ny = move
-        new_game = game.clone_for_minimax()
-        cloned_piece = get_piece_in_clone(new_game, piece)
-        if cloned_piece is None:
-            return 0
-        new_game.move_piece(cloned_piece, nx, ny, simulate=True)
-        return evaluate_impossible(new_game, player)
-    
-    moves.sort(key=move_score, reverse=True)
-    return moves
-
-def minimax(game, depth, alpha, beta, player):
-    state_key = get_state_key(game)
-    if state_key in transposition_table:
-        return transposition_table[state_key], None
-
-    # Caso base: profundidade máxima atingida ou jogo finalizado
-    if depth == 0 or game.winner is not None:
+    board = game.board
+    turn = game.turn
+    lair_x, lair_y = LAIRS[3 - turn]
+    lair = lair_y * BOARD_COLS + lair_x
+    enemy_traps = IS_TRAP[3 - turn]
+    scored = []
+    for move in game.legal_moves():
+        piece, x, y = move
+        to = y * BOARD_COLS + x
+        if to == lair:
+            scored.append((1 << 10, move))
+        elif board[to] is not None:
+            scored.append((board[to].kind * 16 - piece.kind + 16, move))
+        elif enemy_traps[to]:
+            scored.append((0, move))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [move for _, move in scored]
+
+def quiescence(game, alpha, beta, player, qdepth=MAX_QUIESCENCE_DEPTH):
+    """Avaliação de uma folha depois de esgotar as jogadas táticas (ver tactical_moves)."""
+    stats.quiescence_nodes += 1
+    if search_limits is not None:
+        search_limits.tick()
+    stats.leaf_evals += 1
+    stand_pat = evaluate_impossible(game, player)
+    if game.winner is not None or qdepth == 0:
+        return stand_pat
+
+    if game.turn == player:
+        if stand_pat >= beta:
+            return stand_pat
+        best_eval = stand_pat
+        alpha = max(alpha, stand_pat)
+        for move in tactical_moves(game):
+            token = game.make_move(move)
+            try:
+                eval_score = quiescence(game, alpha, beta, player, qdepth - 1)
+            finally:
+                game.unmake_move(token)
+            best_eval = max(best_eval, eval_score)
+            alpha = max(alpha, eval_score)
+            if beta <= alpha:
+                break
+    else:
+        if stand_pat <= alpha:
+            return stand_pat
+        best_eval = stand_pat
+        beta = min(beta, stand_pat)
+        for move in tactical_moves(game):
+            token = game.make_move(move)
+            try:
+                eval_score = quiescence(game, alpha, beta, player, qdepth - 1)
+            finally:
+                game.unmake_move(token)
+            best_eval = min(best_eval, eval_score)
+            beta = min(beta, eval_score)
+            if beta <= alpha:
+                break
+    return best_eval
+
+def record_cutoff(game, move, depth, ply):
+    """Uma jogada calma provocou um corte: passa a killer deste ply e sobe na tabela de história."""
+    piece, x, y = move
+    if game.board[y * BOARD_COLS + x] is not None:
+        return  # as capturas já vêm primeiro
+    code = encode_move(move)
+    if ply < MAX_PLY:
+        killers = killer_moves[ply]
+        if killers[0] != code:
+            killers[1] = killers[0]
+            killers[0] = code
+    history[code] += depth * depth
+
+def new_search(age_table=True):
+    """
+    Começa uma pesquisa: envelhece a tabela de transposição (se age_table; uma tabela partilhada
+    é envelhecida uma só vez por quem a criou) e a história, esquece as killers.
+    """
+    global stats
+    stats = SearchStats("ai_minimax")
+    if age_table:
+        transposition_table.new_search()
+    for killers in killer_moves:
+        killers[0] = killers[1] = None
+    for code in range(4096):
+        history[code] >>= 1
+
+def reset_ordering():
+    """Esquece as killers e a história: a ordenação das jogadas deixa de depender das pesquisas anteriores."""
+    for killers in killer_moves:
+        killers[0] = killers[1] = None
+    history[:] = [0] * 4096
+
+def store(state_key, depth, alpha, beta, value, move):
+    """Guarda o resultado de um nó pesquisado com a janela (alpha, beta)."""
+    if value <= alpha:
+        bound = UPPER  # nenhuma jogada chegou a alpha: o valor real é no máximo value
+    elif value >= beta:
+        bound = LOWER  # corte: o valor real é pelo menos value
+    else:
+        bound = EXACT
+    stats.tt_stores += 1
+    transposition_table.store(state_key, depth, bound, value, encode_move(move))
+
+def is_quiet(game, move):
+    """Jogada que não captura nem entra na toca ou nas armadilhas inimigas."""
+    piece, x, y = move
+    to = y * BOARD_COLS + x
+    lair_x, lair_y = LAIRS[3 - piece.player]
+    return game.board[to] is None and to != lair_y * BOARD_COLS + lair_x and not IS_TRAP[3 - piece.player][to]
+
+def search_child(game, depth, alpha, beta, player, ply, index, quiet, maximizing):
+    """
+    Valor do filho (já jogado) de índice index num nó de profundidade depth, com PVS e LMR
+    conforme USE_PVS e USE_LMR. maximizing diz se o nó pai é do jogador maximizador.
+    """
+    if index > 0 and (USE_PVS or USE_LMR):
+        if maximizing:
+            null_alpha, null_beta = alpha, math.nextafter(alpha, math.inf)
+        else:
+            null_alpha, null_beta = math.nextafter(beta, -math.inf), beta
+
+        def fails(score):
+            # Não melhora o nó pai: o valor com a janela nula é um limite suficiente
+            return score <= alpha if maximizing else score >= beta
+
+        if USE_LMR and quiet and depth >= LMR_MIN_DEPTH and index >= LMR_MIN_MOVES:
+            score, _ = minimax(game, depth - 2, null_alpha, null_beta, player, ply + 1)
+            if fails(score):
+                return score
+        if USE_PVS:
+            score, _ = minimax(game, depth - 1, null_alpha, null_beta, player, ply + 1)
+            # Falha do lado oposto além da janela do pai: o corte é válido sem repetir
+            if fails(score) or (score >= beta if maximizing else score <= alpha):
+                return score
+    score, _ = minimax(game, depth - 1, alpha, beta, player, ply + 1)
+    return score
+
+def minimax(game, depth, alpha, beta, player, ply=0):
+    stats.nodes += 1
+    if search_limits is not None:
+        search_limits.tick()  # SearchTimeout interrompe a iteração
+    state_key = get_state_key(game) ^ SEARCHER_KEYS[player]
+    tt_move = None
+    stats.tt_probes += 1
+    entry = transposition_table.probe(state_key)
+    if entry is not None:
+        stats.tt_hits += 1
+        tt_depth, bound, score, code = entry
+        tt_move = decode_move(game, code)
+        # Só se reutiliza um valor de uma pesquisa pelo menos tão profunda, e conforme o limite
+        if tt_depth >= depth and (bound == EXACT or (bound == LOWER and score >= beta)
+                                  or (bound == UPPER and score <= alpha)):
+            return score, tt_move
+
+    # Posição das tabelas de finais (fora da raiz, que tem de devolver uma jogada): valor exato
+    if USE_TABLEBASES and ply > 0 and len(game.pieces) <= tablebase.MAX_PIECES:
+        score = tablebase.score(game, player, WIN_SCORE)
+        if score is not None:
+            stats.tb_hits += 1
+            return score, None
+
+    # Caso base: jogo finalizado ou profundidade máxima atingida
+    if game.winner is not None or (depth == 0 and not QUIESCENCE):
+        stats.leaf_evals += 1
         score = evaluate_impossible(game, player)
-        transposition_table[state_key] = score
+        stats.tt_stores += 1
+        transposition_table.store(state_key, depth, EXACT, score)
+        return score, None
+    if depth == 0:
+        # O valor da quiescência depende da janela: guarda-se com o limite correspondente
+        score = quiescence(game, alpha, beta, player)
+        store(state_key, 0, alpha, beta, score, None)
         return score, None
 
     best_move = None
+    alpha_orig, beta_orig = alpha, beta
 
     # Jogada do jogador maximizador
     if game.turn == player:
         best_eval = float('-inf')
-        moves = get_ordered_moves(game, player)
-        for piece, nx, ny in moves:
-            new_game = game.clone_for_minimax()
-            clone_piece = get_piece_in_clone(new_game, piece)
-            if clone_piece is None:
-                continue
-            new_game.move_piece(clone_piece, nx, ny, simulate=True)
-            eval_score, _ = minimax(new_game, depth - 1, alpha, beta, player)
+        moves = get_ordered_moves(game, tt_move, ply)
+        for index, (piece, nx, ny) in enumerate(moves):
+            quiet = is_quiet(game, (piece, nx, ny))
+            token = game.make_move((piece, nx, ny))
+            try:
+                eval_score = search_child(game, depth, alpha, beta, player, ply, index, quiet, True)
+            finally:
+                game.unmake_move(token)
             if eval_score > best_eval:
                 best_eval = eval_score
                 best_move = (piece, nx, ny)
             alpha = max(alpha, eval_score)
             if beta <= alpha:
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += index == 0
+                record_cutoff(game, (piece, nx, ny), depth, ply)
                 break  # Poda beta
-        transposition_table[state_key] = best_eval
+        store(state_key, depth, alpha_orig, beta_orig, best_eval, best_move)
         return best_eval, best_move
 
     # Jogada do oponente (minimizador)
     else:
         best_eval = float('inf')
-        moves = get_ordered_moves(game, game.turn)
-        for piece, nx, ny in moves:
-            new_game = game.clone_for_minimax()
-            clone_piece = get_piece_in_clone(new_game, piece)
-            if clone_piece is None:
-                continue
-            new_game.move_piece(clone_piece, nx, ny, simulate=True)
-            eval_score, _ = minimax(new_game, depth - 1, alpha, beta, player)
+        moves = get_ordered_moves(game, tt_move, ply)
+        for index, (piece, nx, ny) in enumerate(moves):
+            quiet = is_quiet(game, (piece, nx, ny))
+            token = game.make_move((piece, nx, ny))
+            try:
+                eval_score = search_child(game, depth, alpha, beta, player, ply, index, quiet, False)
+            finally:
+                game.unmake_move(token)
             if eval_score < best_eval:
                 best_eval = eval_score
                 best_move = (piece, nx, ny)
             beta = min(beta, eval_score)
             if beta <= alpha:
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += index == 0
+                record_cutoff(game, (piece, nx, ny), depth, ply)
                 break  # Poda alfa
-        transposition_table[state_key] = best_eval
+        store(state_key, depth, alpha_orig, beta_orig, best_eval, best_move)
         return best_eval, best_move
 
-def get_best_move(game, depth=4):
+def get_best_move(game, depth=4, time_limit_ms=None, max_nodes=None, with_stats=False):
     """
     Retorna o melhor movimento para o jogador cujo turno está ativo.
+    Com time_limit_ms e/ou max_nodes, usa aprofundamento iterativo até depth (com janelas
+    de aspiração, ver USE_ASPIRATION) e devolve a jogada da última iteração completa;
+    sem limites, pesquisa diretamente a depth.
     Se não houver movimento identificado pelo minimax, tenta retornar
     o primeiro movimento válido encontrado (fallback).
+    Com with_stats, devolve (movimento, SearchStats da pesquisa).
+    Nas posições do livro de aberturas (ver USE_BOOK) devolve a jogada do livro sem pesquisar.
     """
+    global search_limits
     current_player = game.turn
-    score, move = minimax(game, depth, float('-inf'), float('inf'), current_player)
-    if move is None:
-        # Fallback: procurar o primeiro movimento válido entre as peças do jogador
-        for piece in game.pieces:
-            if piece.player == current_player:
-                valid_moves = game.get_valid_moves(piece)
-                if valid_moves:
-                    return (piece, valid_moves[0][0], valid_moves[0][1])
-        return None
-    return move
+    new_search()
+    book = default_book() if USE_BOOK else None
+    move = book.probe(game) if book is not None else None
+    if move is not None:
+        stats.engine = "opening_book"
+        record(stats)
+        return (move, stats) if with_stats else move
+    if time_limit_ms is None and max_nodes is None:
+        score, move = minimax(game, depth, float('-inf'), float('inf'), current_player)
+        stats.end_iteration(depth)
+    else:
+        previous_score = None
+
+        def search(d):
+            nonlocal previous_score
+            if USE_ASPIRATION and previous_score is not None and math.isfinite(previous_score):
+                low, high = previous_score - ASPIRATION_WINDOW, previous_score + ASPIRATION_WINDOW
+                score, best = minimax(game, d, low, high, current_player)
+                if low < score < high:
+                    previous_score = score
+                    stats.end_iteration(d)
+                    return best
+            # Primeira iteração, ou o valor saiu da janela de aspiração: janela completa
+            previous_score, best = minimax(game, d, float('-inf'), float('inf'), current_player)
+            stats.end_iteration(d)
+            return best
+
+        search_limits = SearchLimits(time_limit_ms, max_nodes)
+        try:
+            move, _ = iterative_deepening(search, depth, search_limits)
+        finally:
+            search_limits = None
+    record(stats)
+    moves = game.legal_moves()
+    if move not in moves:
+        # Fallback: o primeiro movimento válido do jogador
+        move = moves[0] if moves else None
+    return (move, stats) if with_stats else move
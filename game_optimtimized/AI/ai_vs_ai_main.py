@@ -1,5 +1,6 @@
 import pygame
 from game_optimized.main_files.config import *
+from game_optimized.main_files.display import SCREEN
 from game_optimized.main_files.game import Game
 from game_optimized.AI.ai_minimax_rand import get_best_move
 
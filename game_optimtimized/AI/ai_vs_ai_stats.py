@@ -1,9 +1,11 @@
 import time
 from game_optimized.main_files.config import *
 from game_optimized.main_files.game import Game
+from game_optimized.AI import search_stats
+from game_optimized.AI.search_stats import SearchStats
 from game_optimized.AI.ai_minimax_rand import get_best_move
 
-def run_games(num_games, depth=3):
+def run_games(num_games, depth=3, ai1=None, ai2=None, log_path=None):
     """
     Run AI vs AI games and collect statistics without visualization.
     
@@ -12,10 +14,15 @@ def run_games(num_games, depth=3):
     Args:
         num_games (int): Number of games to simulate.
         depth (int): Search depth for minimax algorithm.
+        ai1, ai2: get_best_move(game, depth=...) functions of the two players
+            (default: ai_minimax_rand.get_best_move), e.g. game_optimized.AI.mcts.get_best_move.
+        log_path (str): JSONL file receiving the SearchStats of every search (see search_stats).
     
     Returns:
         dict: Statistics including wins, draws, moves, and times.
     """
+    engines = {1: ai1 or get_best_move, 2: ai2 or get_best_move}
+
     # Statistics tracking
     results = {'AI1_wins': 0, 'AI2_wins': 0, 'draws': 0, 'inconclusive': 0}
     total_moves = 0
@@ -23,9 +30,13 @@ def run_games(num_games, depth=3):
     total_time_ai2 = 0
     ai1_move_count = 0
     ai2_move_count = 0
+    # Search counters of each AI, summed over its moves (engines that publish SearchStats)
+    search_totals = {1: SearchStats("AI1"), 2: SearchStats("AI2")}
+    search_stats.log_path = log_path
 
     for game_num in range(num_games):
         game = Game()
+        game.visualize = False  # statistics only: never open a window
         move_count = 0
         running = True
 
@@ -48,7 +59,7 @@ def run_games(num_games, depth=3):
                 elif game.winner == ai2_player:
                     results['AI2_wins'] += 1
                 running = False
-            elif not any(game.get_valid_moves(p) for p in game.pieces if p.player == game.turn):
+            elif not game.legal_moves():
                 # No valid moves for current player: draw or opponent wins
                 if not any(game.get_valid_moves(p) for p in game.pieces if p.player != game.turn):
                     results['draws'] += 1  # Both players have no moves: draw
@@ -58,8 +69,11 @@ def run_games(num_games, depth=3):
             else:
                 # AI move selection
                 start_time = time.time()
-                move = get_best_move(game, depth=depth)  # call without extra player parameter
+                search_stats.last = None
+                move = engines[game.turn](game, depth=depth)  # call without extra player parameter
                 end_time = time.time()
+                if search_stats.last is not None:
+                    search_totals[game.turn].add(search_stats.last)
 
                 # Update timing stats
                 if game.turn == ai1_player:
@@ -94,8 +108,11 @@ def run_games(num_games, depth=3):
         'ai1_win_rate': results['AI1_wins'] / num_games * 100 if num_games > 0 else 0,
         'ai2_win_rate': results['AI2_wins'] / num_games * 100 if num_games > 0 else 0,
         'draw_rate': results['draws'] / num_games * 100 if num_games > 0 else 0,
-        'inconclusive_rate': results['inconclusive'] / num_games * 100 if num_games > 0 else 0
+        'inconclusive_rate': results['inconclusive'] / num_games * 100 if num_games > 0 else 0,
+        'search_ai1': search_totals[1].as_dict(),
+        'search_ai2': search_totals[2].as_dict()
     }
+    search_stats.log_path = None
 
     # Print results
     print("\n=== Final Statistics ===")
@@ -107,6 +124,11 @@ def run_games(num_games, depth=3):
     print(f"Average moves per game: {stats['avg_moves']:.2f}")
     print(f"Average time per move for AI1: {stats['avg_time_ai1']:.4f} seconds")
     print(f"Average time per move for AI2: {stats['avg_time_ai2']:.4f} seconds")
+    for player, totals in search_totals.items():
+        if totals.nodes:
+            print(f"AI{player} search: {totals.nodes + totals.quiescence_nodes} nodes, "
+                  f"{totals.nodes_per_second:.0f} nodes/s, TT hit rate {totals.tt_hit_rate:.1%}, "
+                  f"{totals.cutoffs} cutoffs ({totals.first_move_cutoff_rate:.1%} by the first move)")
 
     return stats
 
@@ -1,12 +1,15 @@
 import pygame
 from game_optimized.main_files.config import *
+from game_optimized.main_files.display import SCREEN
 from game_optimized.main_files.game import Game
-from game_optimized.AI.minimax_rand import get_best_move
+from game_optimized.AI.ponder import Ponderer
 
 def main(eval_function):
     pygame.init()
     clock = pygame.time.Clock()
     game = Game()
+    # The AI searches in a background thread, also during the player's turn
+    ponderer = Ponderer(eval_function, depth=3)
     running = True
 
     while running:
@@ -18,6 +21,7 @@ def main(eval_function):
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:
                     game = Game()
+                    ponderer.reset()
             elif event.type == pygame.MOUSEBUTTONDOWN and game.turn == 1 and game.winner is None:
                 mx, my = event.pos
                 if MARGIN_LEFT <= mx < MARGIN_LEFT + BOARD_WIDTH and MARGIN_TOP <= my < MARGIN_TOP + BOARD_HEIGHT:
@@ -33,25 +37,24 @@ def main(eval_function):
                     elif game.selected_piece:
                         game.move_piece(game.selected_piece, board_x, board_y)
         
-        # AI turn: only run when no events need handling and the game isn't over
-        if game.winner is None and game.turn == 2:
-            pygame.time.delay(50)  # Optional delay for visualization
-            move = get_best_move(game, depth=3, eval_function=eval_function)
-            if move is None:
+        if game.winner is None and game.turn == 1:
+            ponderer.ponder(game)
+        # AI turn: the move is played as soon as the background search has it
+        elif game.winner is None and game.turn == 2:
+            if not game.legal_moves():
                 print("No valid moves available. Ending game.")
                 running = False
             else:
-                piece, nx, ny = move
-                # Find the matching piece in the current game state.
-                for p in game.pieces:
-                    if p.name == piece.name and p.x == piece.x and p.y == piece.y and p.player == piece.player:
-                        game.move_piece(p, nx, ny)
-                        break
+                move = ponderer.reply(game)
+                if move is not None:
+                    piece, nx, ny = move
+                    game.move_piece(piece, nx, ny)
 
         game.draw()
         pygame.display.flip()
         clock.tick(50)
 
+    ponderer.stop()
     pygame.quit()
 
 if __name__ == "__main__":
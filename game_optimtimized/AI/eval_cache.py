@@ -0,0 +1,87 @@
+"""
+Cache of evaluation results, shared by the evaluate_* functions.
+
+The searches evaluate the same position many times (transpositions, iterative deepening, the
+quiescence stand-pat after a leaf). Each evaluate_* is wrapped with cached_evaluation: the
+result is stored under (Game.hash, player, function name) together with the function's
+current weights, so changing a WEIGHT_* constant makes the old entries miss instead of
+returning stale scores. The cache holds at most MAX_ENTRIES results and drops the least
+recently used one first.
+
+The scores also depend on the endgame tablebase files present: tablebase.generate() clears the
+cache when it writes a table. A table written by another process is only seen after
+tablebase._tables and cache are cleared by hand (or in a new process).
+
+    from game_optimized.AI import eval_cache
+    eval_cache.cache.hits, eval_cache.cache.misses, eval_cache.cache.hit_rate
+    eval_cache.ENABLED = False   # always evaluate (e.g. to time an evaluation)
+
+The uncached function stays available as evaluate_*.__wrapped__.
+"""
+import functools
+from collections import OrderedDict
+
+ENABLED = True
+MAX_ENTRIES = 1 << 16
+
+
+class EvalCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (weights, score), least recently used first
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def get(self, key, weights):
+        """Cached score for key computed with weights, or None."""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != weights:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, weights, score):
+        entries = self.entries
+        entries[key] = (weights, score)
+        entries.move_to_end(key)
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+cache = EvalCache()
+
+def cached_evaluation(weights=()):
+    """
+    Decorator of an evaluate(game, player) function. weights: names of the module-level
+    constants the evaluation depends on (read from the function's module at every call).
+    """
+    def decorate(evaluate):
+        namespace = evaluate.__globals__
+        name = evaluate.__name__
+
+        @functools.wraps(evaluate)
+        def wrapper(game, player):
+            if not ENABLED:
+                return evaluate(game, player)
+            key = (game.hash, player, name)
+            current = tuple(namespace[w] for w in weights)
+            score = cache.get(key, current)
+            if score is None:
+                score = evaluate(game, player)
+                cache.put(key, current, score)
+            return score
+        return wrapper
+    return decorate
@@ -1,23 +1,28 @@
-from game_optimized.main_files.piece import Piece
+from game_optimized.main_files.piece import MOUSE
+from game_optimized.main_files.board import IS_TRAP, LAIR_DISTANCE
+from game_optimized.main_files.config import BOARD_COLS
+from game_optimized.AI.tablebase import score as tablebase_score
+from game_optimized.AI.eval_cache import cached_evaluation
 
 #High/low values representimg the win, could be any high/low value
 WIN_SCORE = 100000
 LOSS_SCORE = -100000
 
+@cached_evaluation()
 def evaluate_easy(game, player):
     # Checks if the current player won or lost
     if game.winner is not None:
         return WIN_SCORE if game.winner == player else LOSS_SCORE
+    # Few animals left: exact result from the endgame tablebases, if generated
+    exact = tablebase_score(game, player, WIN_SCORE)
+    if exact is not None:
+        return exact
 
     score = 0
-    if player == 1:
-        opp_traps = game.traps_2
-        opp_den = game.lair_2
-        own_den = game.lair_1
-    else:
-        opp_traps = game.traps_1
-        opp_den = game.lair_1
-        own_den = game.lair_2
+    opponent = 3 - player
+    opp_traps = IS_TRAP[opponent]
+    opp_den_distance = LAIR_DISTANCE[opponent]
+    own_den_distance = LAIR_DISTANCE[player]
 
     # These parameters control the contribution of distance and mobility to the score.
 
@@ -27,25 +32,26 @@ def evaluate_easy(game, player):
 
     # Loop over every piece, to evaluate the two parameters
     for piece in game.pieces:
+        square = piece.y * BOARD_COLS + piece.x
         # Determine the effective value of the piece
         # If the piece is on an opponent's trap, its value is reduced to 0
-        if (piece.x, piece.y) in opp_traps:
+        if opp_traps[square]:
             effective_value = 0
-        elif piece.name == "mouse": effective_value = 5
+        elif piece.kind == MOUSE: effective_value = 5
         else:
-            effective_value = Piece.hierarchy[piece.name]
+            effective_value = piece.kind
 
         # Calculate a bonus (if) or penalty (else) based on the Manhattan distance to the enemy lair (or own lair for opponent)
         if piece.player == player:
             # For the current player's pieces, a closer distance to the opponent's lair is better
-            distance = abs(piece.x - opp_den[0]) + abs(piece.y - opp_den[1])
+            distance = opp_den_distance[square]
     
             # The bonus is higher when the piece is closer (i.e. when distance is smaller)
             bonus_distance = (max_distance - distance) * factor_distance
         else:
 
             # For the opponent's pieces, we want them to be farther from our own lair
-            distance = abs(piece.x - own_den[0]) + abs(piece.y - own_den[1])
+            distance = own_den_distance[square]
 
             # The bonus is negative since the closer the opponent is, the worse it is
             bonus_distance = -(max_distance - distance) * factor_distance
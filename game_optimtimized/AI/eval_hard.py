@@ -1,10 +1,13 @@
-from game_optimized.main_files.piece import Piece
-from game_optimized.main_files.board import is_water
+from game_optimized.main_files.piece import MOUSE, ELEPHANT
+from game_optimized.main_files.board import WATER
+from game_optimized.AI.tablebase import score as tablebase_score
+from game_optimized.AI.eval_cache import cached_evaluation
+from game_optimized.AI.eval_tables import (NEIGHBOUR_SQUARES, PIECE_VALUE, ADVANCE, LAIR_THREAT,
+                                           TRAP_NEIGHBOURS, RIVERBANK_SQUARES, mobility)
 
 # Constants for win/loss scores
 WIN_SCORE = 10000
 LOSS_SCORE = -10000
-MAX_DISTANCE = 11  # Maximum Manhattan distance on the 7x9 board
 BOARD_COLS, BOARD_ROWS = 7, 9  # From config.py
 
 # Weights for various evaluation components (tunable)
@@ -16,12 +19,12 @@ WEIGHT_LAIR_DEFENSE = 1.0
 WEIGHT_MOUSE_POSITION = 0.1
 WEIGHT_PIECE_PROTECTION = 0.1
 WEIGHT_CENTRAL_CONTROL = 0.05
+# Names of the weights above: the cached scores are tagged with their values
+EVAL_WEIGHTS = ("WEIGHT_PIECE_VALUE", "WEIGHT_DISTANCE", "WEIGHT_MOBILITY", "WEIGHT_TRAP_CONTROL",
+                "WEIGHT_LAIR_DEFENSE", "WEIGHT_MOUSE_POSITION", "WEIGHT_PIECE_PROTECTION",
+                "WEIGHT_CENTRAL_CONTROL")
 
-def get_adjacent_positions(x, y):
-    """Return list of adjacent positions within board boundaries."""
-    return [(x + dx, y + dy) for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]
-            if 0 <= x + dx < BOARD_COLS and 0 <= y + dy < BOARD_ROWS]
-
+@cached_evaluation(EVAL_WEIGHTS)
 def evaluate_hard(game, player):
     """
     Evaluate the game state from the perspective of the given player.
@@ -30,102 +33,71 @@ def evaluate_hard(game, player):
     # Check for win/loss conditions
     if game.winner is not None:
         return WIN_SCORE if game.winner == player else LOSS_SCORE
+    # Few animals left: exact result from the endgame tablebases, if generated
+    exact = tablebase_score(game, player, WIN_SCORE)
+    if exact is not None:
+        return exact
 
     score = 0
-
-    # Determine player-specific board elements
-    if player == 1:
-        opp_traps = game.traps_2
-        own_traps = game.traps_1
-        opp_den = game.lair_2  # (3, 0)
-        own_den = game.lair_1  # (3, 8)
-    else:
-        opp_traps = game.traps_1
-        own_traps = game.traps_2
-        opp_den = game.lair_1  # (3, 8)
-        own_den = game.lair_2  # (3, 0)
+    board = game.board
+    pieces = game.pieces
+    squares = [piece.y * BOARD_COLS + piece.x for piece in pieces]
 
     # 1. Piece Values and Distance to Lair
-    for piece in game.pieces:
-        # Piece value adjusted for traps
-        is_on_opp_trap = (piece.x, piece.y) in (opp_traps if piece.player == player else own_traps)
-        effective_value = 0 if is_on_opp_trap else Piece.hierarchy[piece.name]
-
-        # Distance component
+    # (the value is 0 on an enemy trap, one around the other player's lair)
+    for piece, square in zip(pieces, squares):
+        value = (PIECE_VALUE[piece.player][piece.kind][square] * WEIGHT_PIECE_VALUE
+                 + ADVANCE[piece.player][square] * WEIGHT_DISTANCE)
         if piece.player == player:
-            distance = abs(piece.x - opp_den[0]) + abs(piece.y - opp_den[1])
-            bonus_distance = (MAX_DISTANCE - distance) * WEIGHT_DISTANCE
-            score += effective_value * WEIGHT_PIECE_VALUE + bonus_distance
+            score += value
         else:
-            distance = abs(piece.x - own_den[0]) + abs(piece.y - own_den[1])
-            bonus_distance = (MAX_DISTANCE - distance) * WEIGHT_DISTANCE
-            score -= effective_value * WEIGHT_PIECE_VALUE + bonus_distance
+            score -= value
 
     # 2. Mobility
-    for piece in game.pieces:
-        mobility = len(game.get_valid_moves(piece))
+    for piece in pieces:
         if piece.player == player:
-            score += mobility * WEIGHT_MOBILITY
+            score += mobility(board, piece) * WEIGHT_MOBILITY
         else:
-            score -= mobility * WEIGHT_MOBILITY
+            score -= mobility(board, piece) * WEIGHT_MOBILITY
 
     # 3. Trap Control
-    for trap in opp_traps:
-        adjacent = get_adjacent_positions(trap[0], trap[1])
-        control = sum(1 for pos in adjacent for p in game.pieces
-                      if p.player == player and (p.x, p.y) == pos)
+    for adjacent in TRAP_NEIGHBOURS[3 - player]:
+        control = sum(1 for s in adjacent if (p := board[s]) is not None and p.player == player)
         score += control * WEIGHT_TRAP_CONTROL
 
-    for trap in own_traps:
-        adjacent = get_adjacent_positions(trap[0], trap[1])
-        control = sum(1 for pos in adjacent for p in game.pieces
-                      if p.player != player and (p.x, p.y) == pos)
+    for adjacent in TRAP_NEIGHBOURS[player]:
+        control = sum(1 for s in adjacent if (p := board[s]) is not None and p.player != player)
         score -= control * WEIGHT_TRAP_CONTROL
 
     # 4. Lair Defense Penalty
-    opp_pieces = [p for p in game.pieces if p.player != player]
-    if opp_pieces:
-        min_opp_distance = min(abs(p.x - own_den[0]) + abs(p.y - own_den[1]) for p in opp_pieces)
-        penalty = (MAX_DISTANCE - min_opp_distance) * WEIGHT_LAIR_DEFENSE
-        score -= penalty
-
-    # 5. Mouse Positioning
-    player_mouse = next((p for p in game.pieces if p.player == player and p.name == "mouse"), None)
-    if player_mouse:
-        if is_water(player_mouse.x, player_mouse.y):
-            score += WEIGHT_MOUSE_POSITION
-        for p in game.pieces:
-            if (p.player != player and p.name == "elephant" and
-                abs(p.x - player_mouse.x) + abs(p.y - player_mouse.y) == 1):
-                score += WEIGHT_MOUSE_POSITION
-
-    opp_mouse = next((p for p in game.pieces if p.player != player and p.name == "mouse"), None)
-    if opp_mouse:
-        if is_water(opp_mouse.x, opp_mouse.y):
-            score -= WEIGHT_MOUSE_POSITION
-        for p in game.pieces:
-            if (p.player == player and p.name == "elephant" and
-                abs(p.x - opp_mouse.x) + abs(p.y - opp_mouse.y) == 1):
-                score -= WEIGHT_MOUSE_POSITION
+    lair_threat = LAIR_THREAT[player]
+    threats = [lair_threat[square] for piece, square in zip(pieces, squares) if piece.player != player]
+    if threats:
+        score -= max(threats) * WEIGHT_LAIR_DEFENSE
+
+    # 5. Mouse Positioning (the player's mouse first, then the opponent's)
+    mice = sorted((piece.player != player, square) for piece, square in zip(pieces, squares)
+                  if piece.kind == MOUSE)
+    for is_opponent, square in mice:
+        bonus = -WEIGHT_MOUSE_POSITION if is_opponent else WEIGHT_MOUSE_POSITION
+        if WATER[square]:
+            score += bonus
+        for s in NEIGHBOUR_SQUARES[square]:
+            if (p := board[s]) is not None and (p.player == player) == is_opponent and p.kind == ELEPHANT:
+                score += bonus
 
     # 6. Piece Protection
-    for piece in game.pieces:
-        adjacent = get_adjacent_positions(piece.x, piece.y)
+    for piece, square in zip(pieces, squares):
+        protectors = sum(1 for s in NEIGHBOUR_SQUARES[square] if (p := board[s]) is not None and p.player == piece.player)
         if piece.player == player:
-            protectors = sum(1 for pos in adjacent for p in game.pieces
-                             if p.player == player and (p.x, p.y) == pos)
             score += protectors * WEIGHT_PIECE_PROTECTION
         else:
-            protectors = sum(1 for pos in adjacent for p in game.pieces
-                             if p.player != player and (p.x, p.y) == pos)
             score -= protectors * WEIGHT_PIECE_PROTECTION
 
     # 7. Central Control
-    central_squares = [(x, y) for x in range(BOARD_COLS) for y in range(BOARD_ROWS)
-                       if not is_water(x, y) and any(is_water(nx, ny) for nx, ny in get_adjacent_positions(x, y))]
-    for pos in central_squares:
-        for p in game.pieces:
-            if (p.x, p.y) == pos:
-                score += WEIGHT_CENTRAL_CONTROL if p.player == player else -WEIGHT_CENTRAL_CONTROL
+    for square in RIVERBANK_SQUARES:
+        p = board[square]
+        if p is not None:
+            score += WEIGHT_CENTRAL_CONTROL if p.player == player else -WEIGHT_CENTRAL_CONTROL
 
-    return score
\ No newline at end of file
+    return score
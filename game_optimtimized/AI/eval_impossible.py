@@ -1,10 +1,13 @@
-from game_optimized.main_files.piece import Piece
-from game_optimized.main_files.board import is_water
+from game_optimized.main_files.board import WATER, IS_TRAP
+from game_optimized.AI.tablebase import score as tablebase_score
+from game_optimized.AI.eval_cache import cached_evaluation
+from game_optimized.AI.eval_tables import (NEIGHBOUR_SQUARES, PIECE_VALUE, ADVANCE, LAIR_THREAT,
+                                           TRAP_NEIGHBOURS, RIVERBANK_SQUARES, THREATENS, JUMP_LANES,
+                                           JUMPERS, mobility)
 
 # Constants for win/loss scores
 WIN_SCORE = 10000
 LOSS_SCORE = -10000
-MAX_DISTANCE = 11  # Maximum Manhattan distance on the 7x9 board
 BOARD_COLS, BOARD_ROWS = 7, 9  # From config.py
 
 # Enhanced weights for evaluation components (tuned for maximum strength)
@@ -13,53 +16,16 @@ WEIGHT_DISTANCE = 2.0          # Strong incentive to approach opponent's den
 WEIGHT_MOBILITY = 1.5          # Emphasize move options, especially for key pieces
 WEIGHT_TRAP_CONTROL = 5.0      # Traps are critical for captures
 WEIGHT_LAIR_DEFENSE = 20.0     # Severe penalty for threats to own den
-WEIGHT_RAT_POSITION = 3.0      # Rats are strategically vital
 WEIGHT_PIECE_PROTECTION = 2.0  # Encourage piece support
 WEIGHT_CENTRAL_CONTROL = 1.0   # Control key areas near water
 WEIGHT_THREATS = 15.0          # Heavy weight on immediate capture opportunities
 WEIGHT_JUMP_POSITION = 4.0     # Bonus for Lions/Tigers in jump positions
+# Names of the weights above: the cached scores are tagged with their values
+EVAL_WEIGHTS = ("WEIGHT_PIECE_VALUE", "WEIGHT_DISTANCE", "WEIGHT_MOBILITY", "WEIGHT_TRAP_CONTROL",
+                "WEIGHT_LAIR_DEFENSE", "WEIGHT_PIECE_PROTECTION", "WEIGHT_CENTRAL_CONTROL",
+                "WEIGHT_THREATS", "WEIGHT_JUMP_POSITION")
 
-def get_adjacent_positions(x, y):
-    """Return list of adjacent positions within board boundaries."""
-    return [(x + dx, y + dy) for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]
-            if 0 <= x + dx < BOARD_COLS and 0 <= y + dy < BOARD_ROWS]
-
-def can_capture(attacker, defender, game):
-    """Determine if attacker can capture defender based on Jungle rules."""
-    # Check if defender is in attacker's trap
-    own_traps = game.traps_1 if attacker.player == 1 else game.traps_2
-    if (defender.x, defender.y) in own_traps:
-        return True  # Any piece can capture a piece on its own trap
-    
-    # Check water rule: only rats can capture in water
-    if is_water(defender.x, defender.y):
-        return attacker.name == "rat"
-    
-    # Special case: rat can capture elephant
-    if attacker.name == "mouse" and defender.name == "elephant":
-        return True
-    
-    # Special case: elephant cannot capture rat
-    if attacker.name == "elephant" and defender.name == "mouse":
-        return False
-    
-    # General case: compare ranks using the hierarchy dictionary
-    return Piece.hierarchy[attacker.name] >= Piece.hierarchy[defender.name]
-
-def is_jump_position(piece, game):
-    """Check if a Lion or Tiger is in position to jump over the river."""
-    if piece.name not in ["lion", "tiger"]:
-        return False
-    x, y = piece.x, piece.y
-    # Assuming river is roughly rows 3-5; adjust based on exact board layout
-    # Player 1: jump from row 3 to 6, Player 2: jump from row 6 to 3
-    jump_rows = {1: 3, 2: 6}
-    target_row = 6 if piece.player == 1 else 3
-    return y == jump_rows[piece.player] and not any(
-        p.x == x and p.y in range(min(y, target_row), max(y, target_row) + 1)
-        for p in game.pieces if p != piece
-    ) and all(is_water(x, ny) for ny in range(4, 6))
-
+@cached_evaluation(EVAL_WEIGHTS)
 def evaluate_impossible(game, player):
     """
     Evaluate the game state from the player's perspective.
@@ -67,109 +33,85 @@ def evaluate_impossible(game, player):
     """
     if game.winner is not None:
         return WIN_SCORE if game.winner == player else LOSS_SCORE
+    # Few animals left: exact result from the endgame tablebases, if generated
+    exact = tablebase_score(game, player, WIN_SCORE)
+    if exact is not None:
+        return exact
 
     score = 0
-    opp_traps = game.traps_2 if player == 1 else game.traps_1
-    own_traps = game.traps_1 if player == 1 else game.traps_2
-    opp_den = game.lair_2 if player == 1 else game.lair_1  # (3, 0) or (3, 8)
-    own_den = game.lair_1 if player == 1 else game.lair_2  # (3, 8) or (3, 0)
+    board = game.board
+    pieces = game.pieces
+    squares = [piece.y * BOARD_COLS + piece.x for piece in pieces]
 
     # 1. Piece Values and Distance to Opponent's Den
-    for piece in game.pieces:
-        is_on_opp_trap = (piece.x, piece.y) in (opp_traps if piece.player == player else own_traps)
-        effective_value = 0 if is_on_opp_trap else Piece.hierarchy[piece.name]
-        distance = abs(piece.x - opp_den[0]) + abs(piece.y - opp_den[1]) if piece.player == player else \
-                   abs(piece.x - own_den[0]) + abs(piece.y - own_den[1])
-        bonus_distance = (MAX_DISTANCE - distance) * WEIGHT_DISTANCE
+    for piece, square in zip(pieces, squares):
+        value = (PIECE_VALUE[piece.player][piece.kind][square] * WEIGHT_PIECE_VALUE
+                 + ADVANCE[piece.player][square] * WEIGHT_DISTANCE)
         if piece.player == player:
-            score += effective_value * WEIGHT_PIECE_VALUE + bonus_distance
+            score += value
         else:
-            score -= effective_value * WEIGHT_PIECE_VALUE + bonus_distance
+            score -= value
 
     # 2. Mobility
-    for piece in game.pieces:
-        mobility = len(game.get_valid_moves(piece))
+    for piece in pieces:
         if piece.player == player:
-            score += mobility * WEIGHT_MOBILITY
+            score += mobility(board, piece) * WEIGHT_MOBILITY
         else:
-            score -= mobility * WEIGHT_MOBILITY
+            score -= mobility(board, piece) * WEIGHT_MOBILITY
 
     # 3. Trap Control
-    for trap in opp_traps:
-        adjacent = get_adjacent_positions(trap[0], trap[1])
-        control = sum(1 for pos in adjacent for p in game.pieces if p.player == player and (p.x, p.y) == pos)
+    for adjacent in TRAP_NEIGHBOURS[3 - player]:
+        control = sum(1 for s in adjacent if (p := board[s]) is not None and p.player == player)
         score += control * WEIGHT_TRAP_CONTROL
-    for trap in own_traps:
-        adjacent = get_adjacent_positions(trap[0], trap[1])
-        control = sum(1 for pos in adjacent for p in game.pieces if p.player != player and (p.x, p.y) == pos)
+    for adjacent in TRAP_NEIGHBOURS[player]:
+        control = sum(1 for s in adjacent if (p := board[s]) is not None and p.player != player)
         score -= control * WEIGHT_TRAP_CONTROL
 
     # 4. Lair Defense Penalty (Exponential for proximity)
-    opp_pieces = [p for p in game.pieces if p.player != player]
-    if opp_pieces:
-        min_dist = min(abs(p.x - own_den[0]) + abs(p.y - own_den[1]) for p in opp_pieces)
-        penalty = WEIGHT_LAIR_DEFENSE * (MAX_DISTANCE - min_dist) ** 1.5  # Non-linear penalty
-        score -= penalty
-
-    # 5. Rat Positioning
-    player_rat = next((p for p in game.pieces if p.player == player and p.name == "rat"), None)
-    if player_rat:
-        if is_water(player_rat.x, player_rat.y):
-            score += WEIGHT_RAT_POSITION  # Control river
-        for p in game.pieces:
-            if p.player != player and p.name == "elephant" and \
-               abs(p.x - player_rat.x) + abs(p.y - player_rat.y) == 1:
-                score += WEIGHT_RAT_POSITION  # Threaten elephant
-    opp_rat = next((p for p in game.pieces if p.player != player and p.name == "rat"), None)
-    if opp_rat:
-        if is_water(opp_rat.x, opp_rat.y):
-            score -= WEIGHT_RAT_POSITION
-        for p in game.pieces:
-            if p.player == player and p.name == "elephant" and \
-               abs(p.x - opp_rat.x) + abs(p.y - opp_rat.y) == 1:
-                score -= WEIGHT_RAT_POSITION
-
-    # 6. Piece Protection
-    for piece in game.pieces:
-        adjacent = get_adjacent_positions(piece.x, piece.y)
-        protectors = sum(1 for pos in adjacent for p in game.pieces if p.player == piece.player and (p.x, p.y) == pos)
+    lair_threat = LAIR_THREAT[player]
+    threats = [lair_threat[square] for piece, square in zip(pieces, squares) if piece.player != player]
+    if threats:
+        score -= WEIGHT_LAIR_DEFENSE * max(threats) ** 1.5  # Non-linear penalty
+
+    # 5. Piece Protection
+    for piece, square in zip(pieces, squares):
+        protectors = sum(1 for s in NEIGHBOUR_SQUARES[square] if (p := board[s]) is not None and p.player == piece.player)
         if piece.player == player:
-            score += protectors * WEIGHT_PIECE_PROTECTION * (Piece.hierarchy[piece.name] / 8)  # Scale by rank
+            score += protectors * WEIGHT_PIECE_PROTECTION * (piece.kind / 8)  # Scale by rank
         else:
-            score -= protectors * WEIGHT_PIECE_PROTECTION * (Piece.hierarchy[piece.name] / 8)
+            score -= protectors * WEIGHT_PIECE_PROTECTION * (piece.kind / 8)
 
-    # 7. Central Control
-    central_squares = [(x, y) for x in range(BOARD_COLS) for y in range(BOARD_ROWS)
-                       if not is_water(x, y) and any(is_water(nx, ny) for nx, ny in get_adjacent_positions(x, y))]
-    for pos in central_squares:
-        for p in game.pieces:
-            if (p.x, p.y) == pos:
-                score += WEIGHT_CENTRAL_CONTROL if p.player == player else -WEIGHT_CENTRAL_CONTROL
+    # 6. Central Control
+    for square in RIVERBANK_SQUARES:
+        p = board[square]
+        if p is not None:
+            score += WEIGHT_CENTRAL_CONTROL if p.player == player else -WEIGHT_CENTRAL_CONTROL
 
-    # 8. Threat Calculation
+    # 7. Threat Calculation: adjacent enemies the animal could capture (any on the animal's
+    #    traps, none in the water, otherwise by rank)
     player_threats = 0
     opp_threats = 0
-    for piece in game.pieces:
-        if piece.player == player:
-            for adj_pos in get_adjacent_positions(piece.x, piece.y):
-                for opp_piece in game.pieces:
-                    if opp_piece.player != player and (opp_piece.x, opp_piece.y) == adj_pos and \
-                       can_capture(piece, opp_piece, game):
-                        player_threats += Piece.hierarchy[opp_piece.name]
-        else:
-            for adj_pos in get_adjacent_positions(piece.x, piece.y):
-                for own_piece in game.pieces:
-                    if own_piece.player == player and (own_piece.x, own_piece.y) == adj_pos and \
-                       can_capture(piece, own_piece, game):
-                        opp_threats += Piece.hierarchy[own_piece.name]
+    for piece, square in zip(pieces, squares):
+        attacker = piece.player
+        threatens = THREATENS[piece.kind]
+        is_trap = IS_TRAP[attacker]
+        for s in NEIGHBOUR_SQUARES[square]:
+            victim = board[s]
+            if victim is not None and victim.player != attacker and \
+               (is_trap[s] or (not WATER[s] and threatens[victim.kind])):
+                if attacker == player:
+                    player_threats += victim.kind
+                else:
+                    opp_threats += victim.kind
     score += WEIGHT_THREATS * player_threats - WEIGHT_THREATS * opp_threats
 
-    # 9. Lion/Tiger Jump Positioning
-    for piece in game.pieces:
-        if is_jump_position(piece, game):
+    # 8. Lion/Tiger Jump Positioning
+    for piece, square in zip(pieces, squares):
+        if piece.kind in JUMPERS and (lane := JUMP_LANES[piece.player][square]) is not None and \
+           all(board[s] is None for s in lane):
             if piece.player == player:
                 score += WEIGHT_JUMP_POSITION
             else:
                 score -= WEIGHT_JUMP_POSITION
 
-    return score
\ No newline at end of file
+    return score
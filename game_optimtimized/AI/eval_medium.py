@@ -1,27 +1,30 @@
-from game_optimized.main_files.piece import Piece
+from game_optimized.main_files.piece import MOUSE
+from game_optimized.main_files.board import IS_TRAP, LAIR_DISTANCE
+from game_optimized.main_files.config import BOARD_COLS
+from game_optimized.AI.tablebase import score as tablebase_score
+from game_optimized.AI.eval_cache import cached_evaluation
 
 # High/low values representing a win/loss.
 WIN_SCORE = 100000
 LOSS_SCORE = -100000
 
+@cached_evaluation()
 def evaluate_medium(game, player):
     # If the game is already won/lost, return the terminal score.
     if game.winner is not None:
         return WIN_SCORE if game.winner == player else LOSS_SCORE
+    # Few animals left: exact result from the endgame tablebases, if generated
+    exact = tablebase_score(game, player, WIN_SCORE)
+    if exact is not None:
+        return exact
 
     score = 0
 
     # Determine which traps and lairs correspond to which player.
-    if player == 1:
-        opp_traps = game.traps_2    # our pieces are weakened if on enemy traps
-        own_traps = game.traps_1    # enemy pieces are weakened if on our traps
-        opp_den = game.lair_2       # target for our pieces
-        own_den = game.lair_1       # danger for our pieces (enemy targets our den)
-    else:
-        opp_traps = game.traps_1
-        own_traps = game.traps_2
-        opp_den = game.lair_1
-        own_den = game.lair_2
+    opp_traps = IS_TRAP[3 - player]                 # our pieces are weakened if on enemy traps
+    own_traps = IS_TRAP[player]                     # enemy pieces are weakened if on our traps
+    opp_den_distance = LAIR_DISTANCE[3 - player]    # target for our pieces
+    own_den_distance = LAIR_DISTANCE[player]        # danger for our pieces (enemy targets our den)
 
     # Parameters for weighting different aspects.
     max_distance = 11
@@ -33,12 +36,12 @@ def evaluate_medium(game, player):
     # Helper function: returns the effective value of a piece.
     # Pieces on a trap (from the opponent's perspective) are weakened (value 0).
     def effective_value(piece, traps):
-        if (piece.x, piece.y) in traps:
+        if traps[piece.y * BOARD_COLS + piece.x]:
             return 0
-        elif piece.name == "mouse":
+        elif piece.kind == MOUSE:
             return 5
         else:
-            return Piece.hierarchy[piece.name]
+            return piece.kind
 
     # Helper function: returns True if the given piece is threatened
     # (i.e. if any enemy piece can move to its current square).
@@ -56,13 +59,13 @@ def evaluate_medium(game, player):
             # For our own pieces, a piece is less valuable if it is on an enemy trap.
             ev = effective_value(piece, opp_traps)
             # Closer to the opponent's lair is better.
-            distance = abs(piece.x - opp_den[0]) + abs(piece.y - opp_den[1])
+            distance = opp_den_distance[piece.y * BOARD_COLS + piece.x]
             bonus_distance = (max_distance - distance) * factor_distance
         else:
             # For enemy pieces, use our traps to reduce their value.
             ev = effective_value(piece, own_traps)
             # For enemy pieces, being closer to our den is more dangerous.
-            distance = abs(piece.x - own_den[0]) + abs(piece.y - own_den[1])
+            distance = own_den_distance[piece.y * BOARD_COLS + piece.x]
             bonus_distance = -(max_distance - distance) * factor_distance
 
         # Mobility bonus: more legal moves increases the score.
@@ -74,9 +77,9 @@ def evaluate_medium(game, player):
         capture_bonus = 0
         capturable = set()  # to avoid double counting the same enemy piece
         for move in game.get_valid_moves(piece):
-            for enemy in game.pieces:
-                if enemy.player != piece.player and (enemy.x, enemy.y) == move:
-                    capturable.add(enemy)
+            enemy = game.piece_at(*move)
+            if enemy is not None and enemy.player != piece.player:
+                capturable.add(enemy)
         for enemy in capturable:
             # For enemy pieces, use our traps for evaluation.
             enemy_ev = effective_value(enemy, own_traps)
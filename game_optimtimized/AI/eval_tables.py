@@ -0,0 +1,181 @@
+"""
+Tables of the board, computed once, for evaluate_hard and evaluate_impossible.
+
+The terms of these evaluations that depend only on the board layout (distances to the lairs,
+the value of an animal standing on a trap, the cells around the traps, the riverbank, the
+jump lanes) are looked up by square instead of being recomputed for every piece at every
+call. The tables hold no weights, so the WEIGHT_* constants of the evaluations can still be
+changed at run time.
+
+Time of one (uncached) evaluation on random positions:
+
+    python -m game_optimized.AI.eval_tables --positions 200
+    python -m game_optimized.AI.eval_tables --baseline /tmp/before
+        also times the evaluate_* of another version of the package on the same positions (in
+        a subprocess importing game_optimized from that directory, e.g. a git worktree of an
+        earlier commit) and compares their scores
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from game_optimized.main_files.config import BOARD_COLS, BOARD_ROWS
+from game_optimized.main_files.piece import MOUSE, TIGER, LION, ELEPHANT
+from game_optimized.main_files.board import WATER, IS_TRAP, TRAPS, NEIGHBOURS, LAIR_DISTANCE, RIVERBANK
+from game_optimized.AI.tablebase import MOVES, can_capture
+
+MAX_DISTANCE = 11  # Maximum Manhattan distance on the 7x9 board
+CELLS = BOARD_COLS * BOARD_ROWS
+KINDS = range(1, 9)
+
+def _square(x, y):
+    return y * BOARD_COLS + x
+
+# NEIGHBOUR_SQUARES[square]: squares next to square (NEIGHBOURS, as square indices)
+NEIGHBOUR_SQUARES = [tuple(_square(x, y) for x, y in cells) for cells in NEIGHBOURS]
+
+# PIECE_VALUE[player][kind][square]: material of the animal, 0 on a trap of the other player
+PIECE_VALUE = {player: [None] + [[0 if IS_TRAP[3 - player][square] else kind for square in range(CELLS)]
+                                 for kind in KINDS]
+               for player in (1, 2)}
+
+# ADVANCE[player][square]: MAX_DISTANCE minus the distance to the other player's lair
+ADVANCE = {player: [MAX_DISTANCE - distance for distance in LAIR_DISTANCE[3 - player]] for player in (1, 2)}
+
+# LAIR_THREAT[player][square]: MAX_DISTANCE minus the distance to the player's own lair
+LAIR_THREAT = {player: [MAX_DISTANCE - distance for distance in LAIR_DISTANCE[player]] for player in (1, 2)}
+
+# TRAP_NEIGHBOURS[player]: squares around each trap of the player's lair, in TRAPS order
+TRAP_NEIGHBOURS = {player: [NEIGHBOUR_SQUARES[_square(x, y)] for x, y in traps] for player, traps in TRAPS.items()}
+
+RIVERBANK_SQUARES = [_square(x, y) for x, y in RIVERBANK]
+
+# THREATENS[kind][victim]: the rank rules of a capture outside traps and water
+THREATENS = [None] + [[None] + [(kind == MOUSE and victim == ELEPHANT) or
+                                (not (kind == ELEPHANT and victim == MOUSE) and kind >= victim)
+                                for victim in KINDS]
+                      for kind in KINDS]
+
+def _jump_lane(player, square):
+    # Cells of the column between a jump row and the bank across (rows 3 to 6), without square
+    x, y = square % BOARD_COLS, square // BOARD_COLS
+    if y != (3 if player == 1 else 6) or not (WATER[_square(x, 4)] and WATER[_square(x, 5)]):
+        return None
+    return tuple(_square(x, row) for row in range(3, 7) if row != y)
+
+# JUMP_LANES[player][square]: for a lion or tiger in jump position, the cells that must be
+# empty; None on the other squares
+JUMP_LANES = {player: [_jump_lane(player, square) for square in range(CELLS)] for player in (1, 2)}
+JUMPERS = (LION, TIGER)
+
+def mobility(board, piece):
+    """len(game.get_valid_moves(piece)), counted on the precomputed moves of the animal."""
+    player, kind = piece.player, piece.kind
+    origin = piece.y * BOARD_COLS + piece.x
+    count = 0
+    for to, path in MOVES[player][kind][origin]:
+        if path and any((p := board[cell]) is not None and p.kind == MOUSE for cell in path):
+            continue  # a mouse in the water blocks the jump
+        victim = board[to]
+        if victim is None or (victim.player != player and can_capture(kind, player, origin, victim.kind, to)):
+            count += 1
+    return count
+
+
+def random_positions(count, max_plies=80, seed=0):
+    """Unfinished games reached by random moves from the start."""
+    from game_optimized.main_files.game import Game
+
+    rng = random.Random(seed)
+    games = []
+    while len(games) < count:
+        game = Game()
+        game.visualize = False
+        for _ in range(rng.randrange(max_plies)):
+            moves = game.legal_moves()
+            if game.winner is not None or not moves:
+                break
+            game.make_move(rng.choice(moves))
+        if game.winner is None:
+            games.append(game)
+    return games
+
+EVALUATIONS = (("eval_easy", "evaluate_easy"), ("eval_medium", "evaluate_medium"),
+               ("eval_hard", "evaluate_hard"), ("eval_impossible", "evaluate_impossible"))
+
+# Run by --baseline with the other version first on the path: reads the positions and the
+# number of runs, prints {function: [us per call, scores]}
+_BASELINE_SCRIPT = """
+import importlib, json, sys, time
+from game_optimized.main_files.game import Game
+from game_optimized.main_files.piece import Piece
+evaluations, positions, repeat = json.load(sys.stdin)
+games = []
+for turn, pieces in positions:
+    game = Game([Piece(*piece) for piece in pieces])
+    game.turn, game.visualize = turn, False
+    games.append(game)
+results = {}
+for module, name in evaluations:
+    evaluate = getattr(importlib.import_module("game_optimized.AI." + module), name)
+    evaluate = getattr(evaluate, "__wrapped__", evaluate)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for game in games:
+            evaluate(game, 1)
+            evaluate(game, 2)
+        best = min(best, time.perf_counter() - start)
+    scores = [evaluate(game, player) for game in games for player in (1, 2)]
+    results[name] = [best / (2 * len(games)) * 1e6, scores]
+print(json.dumps(results))
+"""
+
+def _time_per_call(evaluate, games, repeat):
+    # Best of repeat runs, in microseconds per call
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for game in games:
+            evaluate(game, 1)
+            evaluate(game, 2)
+        best = min(best, time.perf_counter() - start)
+    return best / (2 * len(games)) * 1e6
+
+def time_baseline(directory, games, repeat):
+    """{function: (us per call, scores)} of the evaluate_* importable from directory."""
+    from game_optimized.main_files.piece import PIECE_NAMES
+
+    positions = [(game.turn, [(PIECE_NAMES[p.kind], p.x, p.y, p.player) for p in game.pieces]) for game in games]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [directory, os.environ.get("PYTHONPATH")])))
+    run = subprocess.run([sys.executable, "-c", _BASELINE_SCRIPT], input=json.dumps([EVALUATIONS, positions, repeat]),
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(run.stdout)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the evaluation functions.")
+    parser.add_argument("--positions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5, help="the best of repeat runs is kept")
+    parser.add_argument("--baseline", help="directory of another version of game_optimized to compare with")
+    args = parser.parse_args()
+
+    games = random_positions(args.positions)
+    baseline = time_baseline(args.baseline, games, args.repeat) if args.baseline else {}
+    for module, name in EVALUATIONS:
+        evaluate = getattr(importlib.import_module("game_optimized.AI." + module), name)
+        evaluate = evaluate.__wrapped__  # without the eval_cache
+        elapsed = _time_per_call(evaluate, games, args.repeat)
+        line = f"{name}: {elapsed:.1f} us per call"
+        if name in baseline:
+            before, scores = baseline[name]
+            same = scores == [evaluate(game, player) for game in games for player in (1, 2)]
+            line += (f", baseline {before:.1f} us, speed-up {before / elapsed:.2f}x, "
+                     f"{'same' if same else 'DIFFERENT'} scores")
+        print(line)
+
+if __name__ == "__main__":
+    main()
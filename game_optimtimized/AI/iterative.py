@@ -0,0 +1,52 @@
+import time
+
+class SearchTimeout(Exception):
+    """Raised from inside the search when the time or node budget runs out."""
+
+class SearchLimits:
+    """
+    Time and node budget of one move. The search calls tick() once per node;
+    the clock is read every 16 nodes (a node costs far more than the clock).
+    cancel() (e.g. from another thread) stops the search at its next node.
+    """
+    __slots__ = ("deadline", "max_nodes", "nodes", "cancelled")
+
+    def __init__(self, time_limit_ms=None, max_nodes=None):
+        self.deadline = time.perf_counter() + time_limit_ms / 1000 if time_limit_ms is not None else None
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def tick(self):
+        self.nodes += 1
+        if self.cancelled:
+            raise SearchTimeout
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout
+        if self.deadline is not None and not self.nodes & 15 and time.perf_counter() >= self.deadline:
+            raise SearchTimeout
+
+    def expired(self):
+        return self.cancelled or (self.deadline is not None and time.perf_counter() >= self.deadline)
+
+def iterative_deepening(search, max_depth, limits):
+    """
+    Call search(depth) for depth = 1, 2, ... max_depth until the budget runs out.
+    search returns a move (or None); an iteration interrupted by SearchTimeout is thrown away.
+
+    Returns (move, depth) of the deepest iteration that finished, (None, 0) if none did.
+    """
+    best_move, completed = None, 0
+    for depth in range(1, max_depth + 1):
+        try:
+            move = search(depth)
+        except SearchTimeout:
+            break
+        if move is not None:
+            best_move, completed = move, depth
+        if limits.expired():
+            break
+    return best_move, completed
@@ -0,0 +1,167 @@
+"""
+Monte Carlo Tree Search (UCT) engine, an alternative to the minimax AIs.
+
+get_best_move(game, ...) runs playouts from the current position: select down the tree with
+UCT, add one node, play the game out with a playout policy and back the result up. The move
+played is the most visited one. The tree is kept between calls: if the new position is a
+child or grandchild of the previous root (our move, then the opponent's), its statistics are
+reused.
+
+Playout policies (POLICIES):
+- "random": uniform among the legal moves
+- "capture": a move into the enemy lair is always played, captures are preferred in
+  proportion to the victim's rank (Piece.hierarchy)
+
+The main performance figure is playouts per second, published in stats after every call.
+"""
+import math
+import random
+import time
+from game_optimized.main_files.board import LAIRS
+from game_optimized.main_files.config import BOARD_COLS
+from game_optimized.AI.transposition import encode_move, decode_move
+
+EXPLORATION = 1.4
+MAX_PLAYOUT_PLIES = 100  # random games last hundreds of plies: longer playouts are scored on material
+CAPTURE_WEIGHT = 2       # extra weight per rank of the captured animal
+
+rng = random.Random()
+
+# Figures of the last search
+stats = {"playouts": 0, "seconds": 0.0, "playouts_per_second": 0.0, "reused_visits": 0, "tree_nodes": 0}
+
+_root = None
+
+
+class Node:
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "player", "key")
+
+    def __init__(self, game, move=None, parent=None, player=None):
+        self.move = move          # encode_move code of the move leading here
+        self.parent = parent
+        self.children = []
+        self.untried = None       # codes not expanded yet (filled on the first visit)
+        self.visits = 0
+        self.wins = 0.0           # sum of the results for player, who made the move leading here
+        self.player = player
+        self.key = game.hash
+
+    def expandable(self, game):
+        if self.untried is None:
+            self.untried = [] if game.winner is not None else [encode_move(m) for m in game.legal_moves()]
+        return bool(self.untried)
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+def random_policy(game, moves):
+    return rng.choice(moves)
+
+def capture_policy(game, moves):
+    board = game.board
+    lair_x, lair_y = LAIRS[3 - game.turn]
+    weights = []
+    for move in moves:
+        _, x, y = move
+        if (x, y) == (lair_x, lair_y):
+            return move
+        victim = board[y * BOARD_COLS + x]
+        weights.append(1 + CAPTURE_WEIGHT * victim.kind if victim is not None else 1)
+    return rng.choices(moves, weights)[0]
+
+POLICIES = {"random": random_policy, "capture": capture_policy}
+
+def playout(game, policy):
+    """
+    Play the game out from here (then undo it). Returns the result for player 1: 1 or 0 for a
+    win or a loss, or player 1's share of the material (sum of ranks) if MAX_PLAYOUT_PLIES is reached.
+    """
+    tokens = []
+    try:
+        while game.winner is None and len(tokens) < MAX_PLAYOUT_PLIES:
+            tokens.append(game.make_move(policy(game, game.legal_moves())))
+        if game.winner is not None:
+            return 1.0 if game.winner == 1 else 0.0
+        material = [0, 0, 0]
+        for p in game.pieces:
+            material[p.player] += p.kind
+        return material[1] / (material[1] + material[2])
+    finally:
+        for token in reversed(tokens):
+            game.unmake_move(token)
+
+def run_playout(game, root, policy):
+    # One iteration: selection, expansion, playout, backpropagation
+    node = root
+    tokens = []
+    try:
+        while not node.expandable(game) and node.children:
+            node = node.select_child()
+            tokens.append(game.make_move(decode_move(game, node.move)))
+        if node.untried:
+            code = node.untried.pop(rng.randrange(len(node.untried)))
+            mover = game.turn
+            tokens.append(game.make_move(decode_move(game, code)))
+            child = Node(game, code, node, mover)
+            node.children.append(child)
+            node = child
+        result = playout(game, policy)
+    finally:
+        for token in reversed(tokens):
+            game.unmake_move(token)
+    while node is not None:
+        node.visits += 1
+        node.wins += result if node.player == 1 else 1 - result
+        node = node.parent
+
+def find_root(game):
+    """The node of the previous tree for this position (child or grandchild of the old root), or None."""
+    if _root is None:
+        return None
+    if _root.key == game.hash:
+        return _root
+    for child in _root.children:
+        if child.key == game.hash:
+            return child
+        for grandchild in child.children:
+            if grandchild.key == game.hash:
+                return grandchild
+    return None
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+def get_best_move(game, depth=None, playouts=2000, time_limit_ms=None, policy="random", reuse_tree=True):
+    """
+    Best move for the player to move after playouts iterations (or time_limit_ms, if given).
+    depth is accepted so the engine can replace the minimax ones; it is not used.
+    """
+    global _root
+    moves = game.legal_moves()
+    if game.winner is not None or not moves:
+        return None
+    play = POLICIES[policy]
+    root = find_root(game) if reuse_tree else None
+    if root is None:
+        root = Node(game)
+    root.parent = None
+    reused = root.visits
+
+    start = time.perf_counter()
+    deadline = start + time_limit_ms / 1000 if time_limit_ms is not None else None
+    done = 0
+    while (done < playouts if deadline is None else time.perf_counter() < deadline):
+        run_playout(game, root, play)
+        done += 1
+    elapsed = time.perf_counter() - start
+
+    _root = root if reuse_tree else None
+    stats.update(playouts=done, seconds=elapsed, playouts_per_second=done / elapsed if elapsed > 0 else 0.0,
+                 reused_visits=reused, tree_nodes=count_nodes(root))
+    if not root.children:
+        return moves[0]
+    best = max(root.children, key=lambda child: child.visits)
+    return decode_move(game, best.move)
@@ -1,52 +1,184 @@
+import math
 import random
 from game_optimized.main_files.game import Game
+from game_optimized.AI.iterative import SearchLimits, iterative_deepening
+from game_optimized.AI.search_stats import SearchStats, record
 
-def minimax(game, depth, player, eval_function):
+# Time/node budget of the running search (None: no limit)
+search_limits = None
+
+# Counters of the running search (a new object for every get_best_move; direct minimax calls add to it)
+stats = SearchStats("minimax_rand")
+
+def alphabeta(game, depth, alpha, beta, player, eval_function):
+    """Value of the position for player (fail-soft alpha-beta); no move is chosen below the root."""
+    stats.nodes += 1
+    if search_limits is not None:
+        search_limits.tick()  # SearchTimeout abandons the iteration
+    if depth == 0 or game.winner is not None:
+        stats.leaf_evals += 1
+        return eval_function(game, player)
+
+    if game.turn == player:  # Maximizing player
+        best_eval = float('-inf')
+        for index, move in enumerate(game.legal_moves()):
+            token = game.make_move(move)
+            try:
+                eval_score = alphabeta(game, depth - 1, alpha, beta, player, eval_function)
+            finally:
+                game.unmake_move(token)
+            if eval_score > best_eval:
+                best_eval = eval_score
+                if best_eval > alpha:
+                    alpha = best_eval
+                    if alpha >= beta:
+                        stats.cutoffs += 1
+                        stats.first_move_cutoffs += index == 0
+                        break
+    else:  # Minimizing player
+        best_eval = float('inf')
+        for index, move in enumerate(game.legal_moves()):
+            token = game.make_move(move)
+            try:
+                eval_score = alphabeta(game, depth - 1, alpha, beta, player, eval_function)
+            finally:
+                game.unmake_move(token)
+            if eval_score < best_eval:
+                best_eval = eval_score
+                if best_eval < beta:
+                    beta = best_eval
+                    if alpha >= beta:
+                        stats.cutoffs += 1
+                        stats.first_move_cutoffs += index == 0
+                        break
+    return best_eval
+
+def best_root_moves(game, depth, player, eval_function, moves=None):
+    """
+    (value, every root move reaching it). Each root move is searched with the window
+    (just below the best value so far, +inf): a move scoring exactly the best value
+    stays inside the window and is found as a tie, anything worse fails low.
+    """
+    stats.nodes += 1
+    best_eval = float('-inf')
+    best_moves = []
+    for move in (game.legal_moves() if moves is None else moves):
+        token = game.make_move(move)
+        try:
+            eval_score = alphabeta(game, depth - 1, math.nextafter(best_eval, float('-inf')), float('inf'),
+                                   player, eval_function)
+        finally:
+            game.unmake_move(token)
+        if eval_score > best_eval:
+            best_eval = eval_score
+            best_moves = [move]
+        elif eval_score == best_eval:
+            best_moves.append(move)
+    return best_eval, best_moves
+
+def minimax(game, depth, player, eval_function, moves=None):
+    """
+    Alpha-beta search for player (normally the player to move). Returns (value, move), the move chosen
+    uniformly at random among the equally best root moves; moves, if given, replaces
+    game.legal_moves() at the root (used to order it).
+    """
+    if depth == 0 or game.winner is not None:
+        stats.leaf_evals += 1
+        return eval_function(game, player), None
+    if game.turn != player:
+        return full_minimax(game, depth, player, eval_function, moves)
+    best_eval, best_moves = best_root_moves(game, depth, player, eval_function, moves)
+    return best_eval, random.choice(best_moves) if best_moves else None
+
+def full_minimax(game, depth, player, eval_function, moves=None):
+    """
+    Full-width minimax without pruning, choosing at random among equal moves at every node.
+    Kept to check and benchmark the alpha-beta search; moves, if given, replaces
+    game.legal_moves() at this node.
+    """
+    stats.nodes += 1
+    if search_limits is not None:
+        search_limits.tick()  # SearchTimeout abandons the iteration
     if depth == 0 or game.winner is not None:
+        stats.leaf_evals += 1
         return eval_function(game, player), None
 
     best_moves = []
     if game.turn == player:  # Maximizing player
         best_eval = float('-inf')
-        for piece in game.pieces:
-            if piece.player == player:
-                for (nx, ny) in game.get_valid_moves(piece):
-                    new_game = game.clone_for_minimax()
-                    clone_piece = next((p for p in new_game.pieces 
-                                        if p.name == piece.name and p.x == piece.x and p.y == piece.y and p.player == piece.player), None)
-                    if clone_piece is None:
-                        continue
-                    new_game.move_piece(clone_piece, nx, ny, simulate=True)
-                    eval_score, _ = minimax(new_game, depth - 1, player, eval_function)
-                    if eval_score > best_eval:
-                        best_eval = eval_score
-                        best_moves = [(piece, nx, ny)]
-                    elif eval_score == best_eval:
-                        best_moves.append((piece, nx, ny))
+        for piece, nx, ny in (game.legal_moves() if moves is None else moves):
+            token = game.make_move((piece, nx, ny))
+            try:
+                eval_score, _ = full_minimax(game, depth - 1, player, eval_function)
+            finally:
+                game.unmake_move(token)
+            if eval_score > best_eval:
+                best_eval = eval_score
+                best_moves = [(piece, nx, ny)]
+            elif eval_score == best_eval:
+                best_moves.append((piece, nx, ny))
     else:  # Minimizing player
         best_eval = float('inf')
-        for piece in game.pieces:
-            if piece.player != player:
-                for (nx, ny) in game.get_valid_moves(piece):
-                    new_game = game.clone_for_minimax()
-                    clone_piece = next((p for p in new_game.pieces 
-                                        if p.name == piece.name and p.x == piece.x and p.y == piece.y and p.player == piece.player), None)
-                    if clone_piece is None:
-                        continue
-                    new_game.move_piece(clone_piece, nx, ny, simulate=True)
-                    eval_score, _ = minimax(new_game, depth - 1, player, eval_function)
-                    if eval_score < best_eval:
-                        best_eval = eval_score
-                        best_moves = [(piece, nx, ny)]
-                    elif eval_score == best_eval:
-                        best_moves.append((piece, nx, ny))
+        for piece, nx, ny in (game.legal_moves() if moves is None else moves):
+            token = game.make_move((piece, nx, ny))
+            try:
+                eval_score, _ = full_minimax(game, depth - 1, player, eval_function)
+            finally:
+                game.unmake_move(token)
+            if eval_score < best_eval:
+                best_eval = eval_score
+                best_moves = [(piece, nx, ny)]
+            elif eval_score == best_eval:
+                best_moves.append((piece, nx, ny))
 
     best_move = random.choice(best_moves) if best_moves else None
     return best_eval, best_move
 
-def get_best_move(game, depth=3, eval_function=None):
+def get_best_move(game, depth=3, eval_function=None, time_limit_ms=None, max_nodes=None, with_stats=False,
+                  book=None):
+    """
+    Without limits, search to depth. With time_limit_ms and/or max_nodes, deepen
+    iteratively up to depth and return the move of the deepest finished iteration;
+    each iteration tries the previous best move first.
+    with_stats: return (move, SearchStats of the search).
+    book: an opening_book.OpeningBook whose moves are played without searching. Not used by
+    default: the book moves come from the strongest search, not from eval_function.
+    """
+    global search_limits, stats
     if eval_function is None:
         raise ValueError("An evaluation function must be provided to get_best_move.")
     current_player = game.turn
-    score, move = minimax(game, depth, current_player, eval_function)
-    return move
+    stats = SearchStats("minimax_rand")
+    move = book.probe(game, random) if book is not None else None
+    if move is not None:
+        stats.engine = "opening_book"
+        record(stats)
+        return (move, stats) if with_stats else move
+    if time_limit_ms is None and max_nodes is None:
+        score, move = minimax(game, depth, current_player, eval_function)
+        stats.end_iteration(depth)
+        record(stats)
+        return (move, stats) if with_stats else move
+
+    best = None
+    def search(d):
+        nonlocal best
+        moves = list(game.legal_moves())
+        if best in moves:
+            moves.remove(best)
+            moves.insert(0, best)
+        best = minimax(game, d, current_player, eval_function, moves)[1]
+        stats.end_iteration(d)
+        return best
+
+    search_limits = SearchLimits(time_limit_ms, max_nodes)
+    try:
+        move, _ = iterative_deepening(search, depth, search_limits)
+    finally:
+        search_limits = None
+    record(stats)
+    if move is None:
+        # Not even depth 1 finished in time: any legal move
+        moves = game.legal_moves()
+        move = moves[0] if moves else None
+    return (move, stats) if with_stats else move
@@ -0,0 +1,219 @@
+"""
+Opening book: moves for the first plies, computed offline and read from a memory-mapped file.
+
+Every game starts from the setup of Game.create_pieces, so the first positions are always the
+same and their (widest, slowest) searches can be done once. The book file holds fixed-size
+records sorted by position key
+
+    header: magic b"JBK1", number of records (uint32)
+    record: Game.hash (uint64), encode_move code (uint16), weight (uint16)
+
+so a lookup is a binary search on the mapped file: nothing is loaded and several processes
+share the pages. A position can have several moves; probe() plays the heaviest one (or draws
+one in proportion to the weights), and only if it is legal in the game, so a key collision or
+a book from other rules cannot produce an illegal move.
+
+Building (the book is written to BOOK_PATH unless --file is given):
+
+    python -m game_optimized.AI.opening_book search --depth 6 --plies 8 --full-plies 1
+        every position of the first full-plies plies, then the book line of each to plies;
+        each move is the ai_minimax search at depth
+    python -m game_optimized.AI.opening_book games 200 --depth 3 --plies 10
+        self-play with ai_minimax_rand (random among equal moves); a move's weight is the
+        number of games in which the side that played it did not lose
+    python -m game_optimized.AI.opening_book show
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+from collections import defaultdict
+from game_optimized.main_files.game import Game
+from game_optimized.AI.transposition import encode_move, decode_move
+
+BOOK_PATH = os.path.join(os.path.dirname(__file__), "opening_book.bin")
+MAGIC = b"JBK1"
+HEADER = struct.Struct("<4sI")
+RECORD = struct.Struct("<QHH")
+MAX_WEIGHT = 0xFFFF
+
+_default_book = None
+
+
+class OpeningBook:
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or len(self.data) != HEADER.size + self.count * RECORD.size:
+            self.data.close()
+            raise ValueError(f"{path} is not an opening book")
+
+    def __len__(self):
+        return self.count
+
+    def _key(self, i):
+        return RECORD.unpack_from(self.data, HEADER.size + i * RECORD.size)[0]
+
+    def entries(self, key):
+        """[(code, weight)] stored for the position key, heaviest first."""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._key(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        found = []
+        while low < self.count:
+            record_key, code, weight = RECORD.unpack_from(self.data, HEADER.size + low * RECORD.size)
+            if record_key != key:
+                break
+            found.append((code, weight))
+            low += 1
+        return found
+
+    def probe(self, game, rng=None):
+        """
+        Book move for the player to move in game, or None. Without rng, the heaviest legal move;
+        with rng (a random.Random), a legal move drawn in proportion to the weights.
+        """
+        if game.winner is not None:
+            return None
+        moves = game.legal_moves()
+        candidates = []
+        for code, weight in self.entries(game.hash):
+            move = decode_move(game, code)
+            if move is not None and move in moves:
+                candidates.append((move, weight))
+        if not candidates:
+            return None
+        if rng is None:
+            return candidates[0][0]
+        return rng.choices([m for m, _ in candidates], [w for _, w in candidates])[0]
+
+    def close(self):
+        self.data.close()
+
+def default_book():
+    """The book at BOOK_PATH (opened once), or None if there is none."""
+    global _default_book
+    if _default_book is None and os.path.exists(BOOK_PATH):
+        _default_book = OpeningBook(BOOK_PATH)
+    return _default_book
+
+def write_book(moves, path=BOOK_PATH):
+    """Write {position key: {code: weight}} as a sorted book file."""
+    global _default_book
+    records = sorted(((key, code, min(weight, MAX_WEIGHT)) for key, codes in moves.items()
+                      for code, weight in codes.items() if weight > 0),
+                     key=lambda r: (r[0], -r[2], r[1]))
+    if _default_book is not None and os.path.abspath(path) == os.path.abspath(BOOK_PATH):
+        _default_book.close()
+        _default_book = None
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records)))
+        for record in records:
+            f.write(RECORD.pack(*record))
+    os.replace(tmp_path, path)
+    return len(records)
+
+def build_from_search(plies=8, depth=6, full_plies=1, progress=False):
+    """
+    Book of the ai_minimax search at depth: every position reachable in the first full_plies
+    plies, then the book move only, up to plies plies. {key: {code: 1}}
+    """
+    from game_optimized.AI import ai_minimax
+
+    use_book, ai_minimax.USE_BOOK = ai_minimax.USE_BOOK, False
+    moves = defaultdict(dict)
+    game = Game()
+    game.visualize = False
+
+    def visit(ply):
+        if ply >= plies or game.winner is not None or game.hash in moves:
+            return
+        move = ai_minimax.get_best_move(game, depth=depth)
+        if move is None:
+            return
+        moves[game.hash][encode_move(move)] = 1
+        if progress:
+            print(f"{len(moves)} positions", end="\r", flush=True)
+        for child in (list(game.legal_moves()) if ply < full_plies else [move]):
+            token = game.make_move(child)
+            try:
+                visit(ply + 1)
+            finally:
+                game.unmake_move(token)
+
+    try:
+        visit(0)
+    finally:
+        ai_minimax.USE_BOOK = use_book
+    return moves
+
+def build_from_games(num_games, plies=10, depth=3, engine=None, max_moves=200):
+    """
+    Book of the first plies moves of num_games self-play games of engine (default
+    ai_minimax_rand.get_best_move). A move scores 1 per game in which its side did not lose.
+    """
+    if engine is None:
+        from game_optimized.AI.ai_minimax_rand import get_best_move as engine
+    moves = defaultdict(lambda: defaultdict(int))
+    for _ in range(num_games):
+        game = Game()
+        game.visualize = False
+        opening = []
+        for ply in range(max_moves):
+            move = engine(game, depth=depth) if game.winner is None else None
+            if move is None:
+                break
+            if ply < plies:
+                opening.append((game.hash, encode_move(move), game.turn))
+            game.make_move(move)
+        for key, code, player in opening:
+            if game.winner in (None, player):
+                moves[key][code] += 1
+    return moves
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the opening book.")
+    parser.add_argument("--file", default=BOOK_PATH, help="book file to write or show")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search", help="book of the ai_minimax search")
+    search.add_argument("--depth", type=int, default=6)
+    search.add_argument("--plies", type=int, default=8)
+    search.add_argument("--full-plies", type=int, default=1, help="plies where every move is followed")
+    games = commands.add_parser("games", help="book of ai_minimax_rand self-play")
+    games.add_argument("num_games", type=int)
+    games.add_argument("--depth", type=int, default=3)
+    games.add_argument("--plies", type=int, default=10)
+    games.add_argument("--seed", type=int)
+    commands.add_parser("show", help="size of the book and the moves of the starting position")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        book = OpeningBook(args.file)
+        game = Game()
+        print(f"{args.file}: {len(book)} moves")
+        for code, weight in book.entries(game.hash):
+            piece, x, y = decode_move(game, code)
+            print(f"  {piece.name} ({piece.x}, {piece.y}) -> ({x}, {y}): weight {weight}")
+        return
+
+    start = time.time()
+    if args.command == "search":
+        moves = build_from_search(args.plies, args.depth, args.full_plies, progress=True)
+    else:
+        if args.seed is not None:
+            random.seed(args.seed)
+        moves = build_from_games(args.num_games, args.plies, args.depth)
+    count = write_book(moves, args.file)
+    print(f"{len(moves)} positions, {count} moves written to {args.file} in {time.time() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Parallel root search for ai_minimax over a process pool.
+
+The root moves are dealt round-robin to the workers. Each worker rebuilds the position
+from a small tuple (pack_position), plays its moves in order and searches each one below
+the best value it has found so far. The parent keeps the highest value; equal values go to
+the move that comes first in the root order, so the result does not depend on which
+worker finishes first.
+
+With shared_table=True the workers also share one SharedTranspositionTable instead of
+starting each task from an empty private table: less repeated work, but the values (and so
+the move) may then depend on the timing of the workers.
+
+    python -m game_optimized.AI.parallel 4
+benchmarks depth 4 with 1, 2, 4, ... workers.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from game_optimized.main_files.game import Game
+from game_optimized.main_files.piece import Piece, PIECE_NAMES
+from game_optimized.AI import ai_minimax
+from game_optimized.AI.transposition import encode_move, decode_move
+from game_optimized.AI.shared_table import SharedTranspositionTable
+
+_executor = None
+_executor_workers = 0
+_shared_table = None    # owned by the parent process
+_private_table = ai_minimax.transposition_table
+_attached_tables = {}   # shared tables attached by search_root_moves (in the workers), by name
+
+def pack_position(game):
+    """Picklable description of the position: (turn, winner, ((kind, x, y, player), ...)) in piece order."""
+    return game.turn, game.winner, tuple((p.kind, p.x, p.y, p.player) for p in game.pieces)
+
+def unpack_position(position):
+    turn, winner, pieces = position
+    game = Game([Piece(PIECE_NAMES[kind], x, y, player) for kind, x, y, player in pieces])
+    game.turn = turn
+    game.winner = winner
+    game.visualize = False
+    return game
+
+def root_order(game):
+    """Root moves as encode_move codes: tactical moves first, then the others in generation order."""
+    tactical = ai_minimax.tactical_moves(game)
+    moves = tactical + [move for move in game.legal_moves() if move not in tactical]
+    return [encode_move(move) for move in moves]
+
+def search_root_moves(position, codes, depth, table_name=None):
+    """
+    Worker task: [(code, value)] for the root moves codes, searched in order with the window
+    (best value so far, +inf), and the number of nodes searched. Values of moves that did not
+    improve are upper bounds; the best one is exact. table_name: shared table to use.
+    """
+    game = unpack_position(position)
+    player = game.turn
+    if table_name is None:
+        ai_minimax.transposition_table = _private_table
+        ai_minimax.transposition_table.clear()
+    else:
+        if table_name not in _attached_tables:
+            _attached_tables[table_name] = SharedTranspositionTable.attach(table_name)
+        ai_minimax.transposition_table = _attached_tables[table_name]
+    # A shared table is aged once per search by the parent
+    ai_minimax.new_search(age_table=table_name is None)
+    # Same start for every task (empty private table, no killers or history from the earlier
+    # tasks of this process), so the result only depends on (position, codes, depth)
+    ai_minimax.reset_ordering()
+    best = float('-inf')
+    results = []
+    for code in codes:
+        token = game.make_move(decode_move(game, code))
+        try:
+            score, _ = ai_minimax.minimax(game, depth - 1, best, float('inf'), player, 1)
+        finally:
+            game.unmake_move(token)
+        results.append((code, score))
+        best = max(best, score)
+    return results, ai_minimax.stats.nodes + ai_minimax.stats.quiescence_nodes
+
+def get_executor(workers):
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        shutdown()
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+def get_shared_table():
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = SharedTranspositionTable(ai_minimax.TT_SIZE_MB)
+    return _shared_table
+
+def shutdown():
+    """
+    Stop the worker processes, close the tables attached in this process and free the shared
+    table (created again on the next parallel search).
+    """
+    global _executor, _executor_workers, _shared_table
+    if _executor is not None:
+        _executor.shutdown()
+        _executor, _executor_workers = None, 0
+    for table in _attached_tables.values():
+        table.close()
+    _attached_tables.clear()
+    if _shared_table is not None:
+        _shared_table.close()
+        _shared_table.unlink()
+        _shared_table = None
+
+def search(game, depth=4, workers=None, shared_table=False):
+    """(value, move, nodes) of the parallel root search; workers defaults to the number of CPUs."""
+    workers = workers or os.cpu_count() or 1
+    codes = root_order(game)
+    if not codes or depth < 1 or game.winner is not None:
+        return None, None, 0
+    position = pack_position(game)
+    # Before the shared table: a new pool (other number of workers) frees the old table
+    executor = get_executor(workers)
+    table_name = None
+    if shared_table:
+        table = get_shared_table()
+        table.new_search()
+        table_name = table.name
+    chunks = [codes[i::workers] for i in range(min(workers, len(codes)))]
+    # Even with one worker the search runs in the pool: search_root_moves replaces the table
+    # and resets the statistics, killers and history of ai_minimax in its process
+    futures = [executor.submit(search_root_moves, position, chunk, depth, table_name) for chunk in chunks]
+    outputs = [future.result() for future in futures]
+
+    index = {code: i for i, code in enumerate(codes)}
+    best_code, best_score, nodes = None, float('-inf'), 0
+    for results, worker_nodes in outputs:
+        nodes += worker_nodes
+        for code, score in results:
+            if score > best_score or (score == best_score and index[code] < index[best_code]):
+                best_code, best_score = code, score
+    return best_score, decode_move(game, best_code), nodes
+
+def get_best_move(game, depth=4, workers=None, shared_table=False):
+    """Same as ai_minimax.get_best_move, with the root moves searched in parallel."""
+    score, move, _ = search(game, depth, workers, shared_table)
+    moves = game.legal_moves()
+    if move not in moves:
+        return moves[0] if moves else None
+    return move
+
+
+if __name__ == "__main__":
+    from game_optimized.main_files.perft import POSITIONS, load_position
+
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    counts = [1]
+    while counts[-1] * 2 <= max(4, os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    print(f"Depth {depth}, {os.cpu_count()} CPUs")
+    reference = None
+    for shared in (False, True):
+        for workers in counts:
+            get_executor(workers)  # start the processes outside the timing
+            start = time.time()
+            nodes, moves = 0, []
+            for name in POSITIONS:
+                game = load_position(name)
+                _, move, n = search(game, depth, workers, shared)
+                nodes += n
+                moves.append(encode_move(move))
+            elapsed = time.time() - start
+            if reference is None:
+                reference = elapsed, moves
+            same = sum(a == b for a, b in zip(moves, reference[1]))
+            print(f"{workers:>2} workers{', shared table' if shared else ''}: {elapsed:.2f} s, "
+                  f"speed-up {reference[0] / elapsed:.2f}x, {nodes} nodes, "
+                  f"same move as 1 worker in {same}/{len(moves)} positions")
+        shutdown()
@@ -0,0 +1,135 @@
+"""
+Background search for the AI vs Player mode, so the pygame loop never waits for the AI.
+
+A Ponderer owns one worker thread running minimax_rand searches on copies of the game:
+- ponder(game), while the human is to move: for each human reply (lair entries and
+  captures first) the worker searches the AI's answer and stores it in the reply cache,
+  keyed by the Zobrist hash of the position after the human move;
+- reply(game), when the AI is to move: the cached answer if the human played one of the
+  pondered moves, otherwise the search of this position is started and None is returned
+  until it is done (poll again on the next frame).
+
+Every job carries its own SearchLimits, created when it is submitted; submitting a job
+cancels the limits of the previous one (SearchLimits.cancel), whether it is running or still
+queued, so the worker always works on the latest position.
+"""
+import queue
+import threading
+import traceback
+from game_optimized.main_files.config import BOARD_COLS
+from game_optimized.main_files.board import LAIRS
+from game_optimized.AI import minimax_rand
+from game_optimized.AI.iterative import SearchLimits, SearchTimeout
+from game_optimized.AI.transposition import encode_move, decode_move
+
+def likely_replies(game):
+    """Legal moves of the player to move, entering the enemy lair and capturing first."""
+    board = game.board
+    lair_x, lair_y = LAIRS[3 - game.turn]
+
+    def priority(move):
+        _, x, y = move
+        if (x, y) == (lair_x, lair_y):
+            return 100
+        victim = board[y * BOARD_COLS + x]
+        return victim.kind if victim is not None else 0
+
+    return sorted(game.legal_moves(), key=priority, reverse=True)
+
+
+class Ponderer:
+    def __init__(self, eval_function, depth=3):
+        self.eval_function = eval_function
+        self.depth = depth
+        self.cache = {}          # position hash -> encode_move code of the AI's answer
+        self.jobs = queue.Queue()
+        self.limits = None       # budget of the last submitted job, cancelled by the next one
+        self.requested = None    # hash of the position last passed to reply()
+        self.pondered = None     # hash of the position last passed to ponder()
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    def _submit(self, kind, game=None):
+        if self.limits is not None:
+            self.limits.cancel()
+        self.limits = SearchLimits()
+        self.jobs.put((kind, game, self.limits))
+
+    def ponder(self, game):
+        """Search the answers to the human's possible moves (call while the human is to move)."""
+        if self.pondered != game.hash:
+            self.pondered = game.hash
+            self._submit("ponder", game.clone_for_minimax())
+
+    def reply(self, game):
+        """The AI's move in game if it is known, else None (the search runs in the background)."""
+        code = self.cache.get(game.hash)
+        if code is not None:
+            return decode_move(game, code)
+        if self.requested != game.hash:
+            self.requested = game.hash
+            self._submit("search", game.clone_for_minimax())
+        return None
+
+    def reset(self):
+        """Forget everything (new game)."""
+        self._submit("reset")
+        self.requested = self.pondered = None
+
+    def stop(self):
+        self._submit("stop")
+        self.thread.join()
+
+    def _search(self, game):
+        # Answer of the player to move in game, stored in the cache; False if cancelled
+        if game.hash in self.cache:
+            return True
+        try:
+            _, move = minimax_rand.minimax(game, self.depth, game.turn, self.eval_function)
+        except SearchTimeout:
+            return False
+        if move is not None:
+            self.cache[game.hash] = encode_move(move)
+        return True
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            # Only the latest job matters
+            while not self.jobs.empty():
+                job = self.jobs.get()
+            kind, game, limits = job
+            if kind == "stop":
+                return
+            if kind == "reset":
+                self.cache.clear()
+                continue
+            minimax_rand.search_limits = limits
+            key = game.hash
+            fallback = None
+            if kind == "search":
+                # Answer if the search fails (taken now: the failure may leave the game unusable)
+                moves = game.legal_moves()
+                fallback = encode_move(moves[0]) if moves else None
+            try:
+                if kind == "search":
+                    self._search(game)
+                else:
+                    for move in likely_replies(game):
+                        token = game.make_move(move)
+                        try:
+                            finished = game.winner is not None or self._search(game)
+                        finally:
+                            game.unmake_move(token)
+                        if not finished:
+                            break
+            except Exception:
+                # A failing search must not stop the worker, or reply() would wait forever.
+                # A failed reply search answers with the first legal move; a failed ponder
+                # is not retried (reply() searches the position the human leaves anyway).
+                traceback.print_exc()
+                if fallback is not None:
+                    self.cache[key] = fallback
+                self.requested = None
+            finally:
+                minimax_rand.search_limits = None
@@ -0,0 +1,85 @@
+"""
+Counters of one search, filled by ai_minimax and minimax_rand.
+
+The engines keep a SearchStats in a module global (stats) and increment its fields in place,
+so collecting them costs a few attribute additions per node. get_best_move(..., with_stats=True)
+returns (move, stats); every finished search is also passed to record(), which keeps it in
+`last` and, if log_path is set, appends it as one JSON line to that file.
+
+    from game_optimized.AI import search_stats
+    search_stats.log_path = "search.jsonl"
+"""
+import json
+import time
+
+log_path = None   # JSONL file receiving every finished search (None: no log)
+last = None       # SearchStats of the last finished search, from any engine
+
+COUNTERS = ("nodes", "quiescence_nodes", "leaf_evals", "tt_probes", "tt_hits", "tt_stores",
+            "cutoffs", "first_move_cutoffs", "tb_hits")
+
+
+class SearchStats:
+    __slots__ = COUNTERS + ("engine", "depth", "seconds", "iterations", "start")
+
+    def __init__(self, engine=""):
+        self.engine = engine
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.depth = 0            # deepest finished iteration
+        self.seconds = 0.0
+        self.iterations = []      # (depth, nodes, seconds) at the end of each finished iteration
+        self.start = time.perf_counter()
+
+    def end_iteration(self, depth):
+        self.depth = depth
+        self.iterations.append((depth, self.nodes + self.quiescence_nodes, time.perf_counter() - self.start))
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.start
+        return self
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        """Share of the cutoffs made by the first move searched: the quality of the move ordering."""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def nodes_per_second(self):
+        return (self.nodes + self.quiescence_nodes) / self.seconds if self.seconds > 0 else 0.0
+
+    def add(self, other):
+        """Add the counters and time of other (used to total several searches)."""
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.depth = max(self.depth, other.depth)
+        self.seconds += other.seconds
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in COUNTERS}
+        data.update(engine=self.engine, depth=self.depth, seconds=round(self.seconds, 6),
+                    iterations=[[d, n, round(s, 6)] for d, n, s in self.iterations],
+                    tt_hit_rate=round(self.tt_hit_rate, 4),
+                    first_move_cutoff_rate=round(self.first_move_cutoff_rate, 4),
+                    nodes_per_second=round(self.nodes_per_second))
+        return data
+
+    def __repr__(self):
+        return (f"SearchStats({self.engine}: depth {self.depth}, {self.nodes} nodes + {self.quiescence_nodes} "
+                f"quiescence, {self.leaf_evals} evals, TT {self.tt_hits}/{self.tt_probes} hits, "
+                f"{self.tt_stores} stores, {self.cutoffs} cutoffs "
+                f"({self.first_move_cutoff_rate:.0%} first move), {self.seconds:.3f} s)")
+
+
+def record(stats):
+    """Publish a finished search: keep it in last and append it to log_path."""
+    global last
+    last = stats.finish()
+    if log_path is not None:
+        with open(log_path, "a") as log:
+            log.write(json.dumps(stats.as_dict()) + "\n")
+    return stats
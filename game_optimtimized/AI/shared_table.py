@@ -0,0 +1,165 @@
+"""
+Transposition table in a multiprocessing.shared_memory block, for the parallel search.
+
+Same interface as transposition.TranspositionTable (probe, store, new_search, clear), so a
+worker can simply set ai_minimax.transposition_table to one. There is no lock: every slot is
+a fixed-width 32-byte record
+
+    check, key, score bits, meta (move << 24 | depth << 16 | bound << 8 | age)
+
+with check = key ^ score bits ^ meta. Two processes writing the same slot at the same time
+can leave a record mixing both writes; its check no longer matches and probe() treats it as
+a miss (counted in torn_reads). The block starts with a small header holding the number of
+slots and the age shared by all processes.
+
+    python -m game_optimized.AI.shared_table
+runs concurrent writers and readers on one table and checks that no mixed record is returned.
+"""
+import struct
+from multiprocessing import shared_memory
+from game_optimized.AI.transposition import EMPTY, NO_MOVE
+
+ENTRY = struct.Struct("<4Q")
+HEADER = struct.Struct("<2Q")  # slots, age
+_FLOAT = struct.Struct("<d")
+_BITS = struct.Struct("<Q")
+
+def _float_bits(value):
+    return _BITS.unpack(_FLOAT.pack(value))[0]
+
+def _bits_float(bits):
+    return _FLOAT.unpack(_BITS.pack(bits))[0]
+
+
+class SharedTranspositionTable:
+    """
+    Fixed-size table shared between processes. The creating process owns the block
+    (unlink() frees it); other processes open it with SharedTranspositionTable.attach(name).
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        if name is None:
+            slots = 1
+            while slots * 2 * ENTRY.size <= size_mb * 2 ** 20:
+                slots *= 2
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER.size + slots * ENTRY.size)
+            self.shm.buf[:] = bytes(len(self.shm.buf))
+            HEADER.pack_into(self.shm.buf, 0, slots, 0)
+        else:
+            # Worker processes share the creator's resource tracker, which frees the block
+            # only if the creator exits without unlink()
+            self.shm = shared_memory.SharedMemory(name=name)
+            slots = HEADER.unpack_from(self.shm.buf, 0)[0]
+        self.buf = self.shm.buf
+        self.mask = slots - 1
+        self.torn_reads = 0
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __len__(self):
+        return self.mask + 1
+
+    @property
+    def age(self):
+        return HEADER.unpack_from(self.buf, 0)[1]
+
+    def new_search(self):
+        HEADER.pack_into(self.buf, 0, self.mask + 1, (self.age + 1) & 255)
+
+    def clear(self):
+        self.buf[HEADER.size:] = bytes(len(self.buf) - HEADER.size)
+        HEADER.pack_into(self.buf, 0, self.mask + 1, 0)
+
+    def _read(self, i):
+        # (key, score bits, meta) of slot i, None if empty or torn
+        check, key, score_bits, meta = ENTRY.unpack_from(self.buf, HEADER.size + i * ENTRY.size)
+        if check != key ^ score_bits ^ meta:
+            self.torn_reads += 1
+            return None
+        if (meta >> 8) & 255 == EMPTY:
+            return None
+        return key, score_bits, meta
+
+    def probe(self, key):
+        """(depth, bound, score, move) stored for key, or None."""
+        entry = self._read(key & self.mask)
+        if entry is None or entry[0] != key:
+            return None
+        _, score_bits, meta = entry
+        return (meta >> 16) & 255, (meta >> 8) & 255, _bits_float(score_bits), meta >> 24
+
+    def store(self, key, depth, bound, score, move=NO_MOVE):
+        i = key & self.mask
+        age = self.age
+        old = self._read(i)
+        if old is not None:
+            old_meta = old[2]
+            if old_meta & 255 == age and (old_meta >> 16) & 255 > depth:
+                return  # a deeper result of the current search stays
+        score_bits = _float_bits(score)
+        meta = move << 24 | depth << 16 | bound << 8 | age
+        ENTRY.pack_into(self.buf, HEADER.size + i * ENTRY.size, key ^ score_bits ^ meta, key, score_bits, meta)
+
+    def memory_bytes(self):
+        return len(self.buf)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _hammer(name, writer, rounds, seed, results):
+    # Test worker: stores records whose content depends on (key, writer) and checks every hit
+    import random
+    table = SharedTranspositionTable.attach(name)
+    rng = random.Random(seed)
+    hits = bad = 0
+    for _ in range(rounds):
+        key = rng.randrange(1, 4096) * 0x9E3779B97F4A7C15 & (2 ** 64 - 1) or 1
+        if rng.random() < 0.5:
+            table.store(key, rng.randrange(1, 8), 1 + key % 3, float(key % 100003 + writer), writer)
+        else:
+            entry = table.probe(key)
+            if entry is not None:
+                hits += 1
+                depth, bound, score, move = entry
+                if bound != 1 + key % 3 or score != float(key % 100003 + move) or not 1 <= depth < 8:
+                    bad += 1
+    results.put((writer, hits, bad, table.torn_reads))
+    table.close()
+
+if __name__ == "__main__":
+    import multiprocessing
+    import sys
+    import time
+
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    table = SharedTranspositionTable(size_mb=0.03125)  # 1024 slots: many writers on the same slots
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_hammer, args=(table.name, w, rounds, w, results))
+               for w in range(1, processes + 1)]
+    start = time.time()
+    for worker in workers:
+        worker.start()
+    outcome = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.time() - start
+    hits = sum(o[1] for o in outcome)
+    bad = sum(o[2] for o in outcome)
+    torn = sum(o[3] for o in outcome)
+    print(f"{processes} processes x {rounds} operations in {elapsed:.1f} s: "
+          f"{hits} hits, {torn} torn records rejected, {bad} inconsistent hits")
+    table.close()
+    table.unlink()
+    raise SystemExit(1 if bad else 0)
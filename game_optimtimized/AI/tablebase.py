@@ -0,0 +1,380 @@
+"""
+Endgame tablebases: the exact result of every position with few animals, solved by retrograde analysis.
+
+A table covers one material signature (the animals of each player) and stores one byte per
+(square of each animal, side to move):
+
+    0            draw (neither side can force a win), or a position that cannot occur
+    odd d        the side to move wins in d plies
+    even d >= 2  the side to move loses in d - 2 plies
+
+Tables are files in TABLE_DIR, read through mmap. A position and the same position turned
+half a turn with the players swapped have the same result, so only one of the two signatures
+is stored (see canonical). Solving a table needs the tables reached by a capture, which are
+solved first.
+
+    python -m game_optimized.AI.tablebase generate 2v1
+        every table with two animals against one (and the 1v1 tables they need)
+    python -m game_optimized.AI.tablebase generate lion,tiger/elephant
+        one table: the animals of player 1, then those of player 2
+    python -m game_optimized.AI.tablebase list
+
+probe(game) and score(game, player, win_score) read them; both return None when the position
+has more than MAX_PIECES animals or its table has not been generated.
+"""
+import argparse
+import itertools
+import mmap
+import os
+import struct
+import time
+from array import array
+from collections import defaultdict
+from game_optimized.main_files.board import WATER, IS_TRAP, LAIRS, NEIGHBOURS, JUMPS
+from game_optimized.main_files.config import BOARD_COLS, BOARD_ROWS
+from game_optimized.main_files.piece import Piece, MOUSE, TIGER, LION, ELEPHANT, PIECE_NAMES
+from game_optimized.AI import eval_cache
+
+TABLE_DIR = os.path.join(os.path.dirname(__file__), "tablebases")
+MAX_PIECES = 4
+MAX_DISTANCE = 253
+
+CELLS = BOARD_COLS * BOARD_ROWS
+LAST = CELLS - 1  # square of a cell turned half a turn: LAST - square
+MAGIC = b"JTB1"
+HEADER = struct.Struct("<4sI")  # magic, number of animals
+
+WIN, LOSS, DRAW = 1, -1, 0
+
+# Byte of the capture array during the solve (otherwise the longest loss through a capture)
+WINNING, DRAWN = 254, 255
+
+_tables = {}  # file name -> mapped table, or None if there is no file
+
+
+def _lair_square(player):
+    x, y = LAIRS[player]
+    return y * BOARD_COLS + x
+
+LAIR_SQUARES = {1: _lair_square(1), 2: _lair_square(2)}
+
+# STAND[player][kind][square]: the animal can be on the square in an unfinished game
+STAND = {player: [None] + [[(kind == MOUSE or not WATER[square]) and square not in LAIR_SQUARES.values()
+                            for square in range(CELLS)] for kind in range(1, 9)]
+         for player in (1, 2)}
+
+def _moves(player, kind, square):
+    # (destination, water cells crossed or ()) of every move of the animal, board permitting
+    moves = [(y * BOARD_COLS + x, ()) for x, y in NEIGHBOURS[square]]
+    if kind in (TIGER, LION):
+        moves += [(y * BOARD_COLS + x, path) for (x, y), path in JUMPS[square]]
+    return [(to, path) for to, path in moves
+            if to != LAIR_SQUARES[player] and (kind == MOUSE or not WATER[to])]
+
+MOVES = {player: [None] + [[_moves(player, kind, square) for square in range(CELLS)] for kind in range(1, 9)]
+         for player in (1, 2)}
+
+# UNMOVES[player][kind][square]: (origin, path) of the quiet moves ending on square
+UNMOVES = {player: [None] + [[[] for _ in range(CELLS)] for kind in range(1, 9)] for player in (1, 2)}
+for _player in (1, 2):
+    for _kind in range(1, 9):
+        for _square in range(CELLS):
+            if STAND[_player][_kind][_square]:
+                for _to, _path in MOVES[_player][_kind][_square]:
+                    if STAND[_player][_kind][_to]:
+                        UNMOVES[_player][_kind][_to].append((_square, _path))
+
+def can_capture(kind, player, origin, victim, to):
+    """The rules of Game.is_valid_move for a capture of victim on to by kind coming from origin."""
+    trap = IS_TRAP[player][to]
+    if kind == ELEPHANT and victim == MOUSE and not trap:
+        return False
+    if kind == MOUSE and WATER[origin] and not WATER[to]:
+        return False
+    return trap or kind >= victim or (kind == MOUSE and victim == ELEPHANT)
+
+
+def canonical(kinds1, kinds2):
+    """The signature (kinds1, kinds2), kinds sorted from the highest rank, is the stored one."""
+    return (len(kinds1), kinds1) >= (len(kinds2), kinds2)
+
+def table_name(kinds1, kinds2):
+    return "-".join(PIECE_NAMES[k] for k in kinds1) + "_vs_" + "-".join(PIECE_NAMES[k] for k in kinds2) + ".tb"
+
+def _table(kinds1, kinds2, directory=None):
+    name = os.path.join(directory or TABLE_DIR, table_name(kinds1, kinds2))
+    if name not in _tables:
+        table = None
+        if os.path.exists(name):
+            with open(name, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or len(data) != HEADER.size + 2 * CELLS ** count:
+                raise ValueError(f"{name} is not a tablebase")
+            table = memoryview(data)[HEADER.size:]
+        _tables[name] = table
+    return _tables[name]
+
+def _index(squares, turn):
+    i = 0
+    for square in squares:
+        i = i * CELLS + square
+    return 2 * i + turn - 1
+
+def lookup(kinds1, squares1, kinds2, squares2, turn, directory=None):
+    """Stored byte of a position (kinds sorted from the highest rank), None if its table is missing."""
+    if not canonical(kinds1, kinds2):
+        kinds1, squares1, kinds2, squares2 = (kinds2, [LAST - s for s in squares2],
+                                              kinds1, [LAST - s for s in squares1])
+        turn = 3 - turn
+    table = _table(kinds1, kinds2, directory)
+    if table is None:
+        return None
+    return table[_index(list(squares1) + list(squares2), turn)]
+
+def decode(code):
+    """(WIN/LOSS/DRAW for the side to move, plies to the end of the game) of a stored byte."""
+    if code == 0:
+        return DRAW, 0
+    if code & 1:
+        return WIN, code
+    return LOSS, code - 2
+
+def probe(game):
+    """(WIN/LOSS/DRAW for the player to move, plies) of an unfinished game, None if not in the tables."""
+    pieces = game.pieces
+    if len(pieces) > MAX_PIECES or game.winner is not None:
+        return None
+    sides = {1: [], 2: []}
+    for p in pieces:
+        sides[p.player].append((p.kind, p.y * BOARD_COLS + p.x))
+    if not sides[1] or not sides[2]:
+        return None
+    for side in sides.values():
+        side.sort(reverse=True)
+    code = lookup(tuple(k for k, _ in sides[1]), [s for _, s in sides[1]],
+                  tuple(k for k, _ in sides[2]), [s for _, s in sides[2]], game.turn)
+    return None if code is None else decode(code)
+
+def score(game, player, win_score):
+    """
+    Exact score of the game for player on the scale of an evaluation (win_score for a won game):
+    a win in d plies is worth win_score - d, a loss -win_score + d and a draw 0. None if not in the tables.
+    """
+    if len(game.pieces) > MAX_PIECES:
+        return None
+    result = probe(game)
+    if result is None:
+        return None
+    outcome, plies = result
+    if outcome == DRAW:
+        return 0
+    if game.turn != player:
+        outcome = -outcome
+    return outcome * (win_score - plies)
+
+
+def sub_signatures(kinds1, kinds2):
+    """Signatures reached by a capture that does not end the game."""
+    subs = set()
+    if len(kinds2) > 1:
+        subs.update((kinds1, kinds2[:i] + kinds2[i + 1:]) for i in range(len(kinds2)))
+    if len(kinds1) > 1:
+        subs.update((kinds1[:i] + kinds1[i + 1:], kinds2) for i in range(len(kinds1)))
+    return [(k1, k2) if canonical(k1, k2) else (k2, k1) for k1, k2 in subs]
+
+def solve(kinds1, kinds2, directory=None):
+    """
+    Bytes of the table of the signature, the tables of sub_signatures being in directory
+    (default TABLE_DIR).
+
+    Every position is first scored from its moves that leave the table (lair entry, capture,
+    looked up in the smaller tables); the positions decided that way, or without any move,
+    seed the retrograde pass. Decided positions are then processed by distance: a lost
+    position makes every predecessor won, a won one takes one move away from each predecessor,
+    which is lost once all its moves lead to won positions. What is left undecided is a draw.
+    """
+    kinds = list(kinds1) + list(kinds2)
+    owners = [1] * len(kinds1) + [2] * len(kinds2)
+    n = len(kinds)
+    weights = [2 * CELLS ** (n - 1 - j) for j in range(n)]
+    size = 2 * CELLS ** n
+    values = bytearray(size)   # result bytes (0 also for "not decided yet")
+    counts = bytearray(size)   # moves staying in the table whose result is not known yet
+    capture = bytearray(size)  # longest loss through a move leaving the table, WINNING or DRAWN
+    buckets = defaultdict(lambda: array("I"))  # distance -> positions decided at that distance
+
+    stand = [STAND[owners[j]][kinds[j]] for j in range(n)]
+    for squares in itertools.product(range(CELLS), repeat=n):
+        if len(set(squares)) < n or not all(stand[j][squares[j]] for j in range(n)):
+            continue
+        base = sum(s * w for s, w in zip(squares, weights))
+        for turn in (1, 2):
+            i = base + turn - 1
+            best_win, longest_loss, drawn, quiet = 0, 0, False, 0
+            enemies = owners.count(3 - turn)
+            enemy_lair = LAIR_SQUARES[3 - turn]
+            for j in range(n):
+                if owners[j] != turn:
+                    continue
+                kind, origin = kinds[j], squares[j]
+                for to, path in MOVES[turn][kind][origin]:
+                    if path and any(cell in squares for cell in path):
+                        continue  # a mouse in the water blocks the jump
+                    if to == enemy_lair:
+                        best_win = 1
+                        continue
+                    if to not in squares:
+                        quiet += 1
+                        continue
+                    o = squares.index(to)
+                    if owners[o] == turn or not can_capture(kind, turn, origin, kinds[o], to):
+                        continue
+                    if enemies == 1:
+                        best_win = 1  # last enemy animal
+                        continue
+                    rest = [k for k in range(n) if k != o]
+                    moved = [to if k == j else squares[k] for k in rest]
+                    code = lookup(tuple(kinds[k] for k in rest if owners[k] == 1),
+                                  [moved[r] for r, k in enumerate(rest) if owners[k] == 1],
+                                  tuple(kinds[k] for k in rest if owners[k] == 2),
+                                  [moved[r] for r, k in enumerate(rest) if owners[k] == 2],
+                                  3 - turn, directory)
+                    if code is None:
+                        raise FileNotFoundError(f"missing sub-table for {table_name(kinds1, kinds2)}")
+                    outcome, plies = decode(code)
+                    if outcome == LOSS:
+                        best_win = plies + 1 if not best_win else min(best_win, plies + 1)
+                    elif outcome == WIN:
+                        longest_loss = max(longest_loss, plies + 1)
+                    else:
+                        drawn = True
+            counts[i] = quiet
+            if best_win:
+                values[i] = best_win
+                buckets[best_win].append(i)
+                capture[i] = WINNING
+            elif drawn:
+                capture[i] = DRAWN
+            else:
+                capture[i] = longest_loss
+                if not quiet:
+                    values[i] = longest_loss + 2
+                    buckets[longest_loss].append(i)
+
+    distance = 0
+    while distance <= MAX_DISTANCE and any(d >= distance for d in buckets):
+        decided = buckets.pop(distance, ())
+        won = distance & 1
+        code = distance if won else distance + 2
+        for i in decided:
+            if values[i] != code:
+                continue  # decided again later at a shorter distance
+            turn = (i & 1) + 1
+            rest, squares = i >> 1, [0] * n
+            for j in range(n - 1, -1, -1):
+                rest, squares[j] = divmod(rest, CELLS)
+            mover = 3 - turn
+            for j in range(n):
+                if owners[j] != mover:
+                    continue
+                to = squares[j]
+                for origin, path in UNMOVES[mover][kinds[j]][to]:
+                    if origin in squares or (path and any(cell in squares for cell in path)):
+                        continue
+                    p = (i ^ 1) + (origin - to) * weights[j]
+                    if not won:
+                        # The predecessor can move into a lost position: won in distance + 1
+                        value = values[p]
+                        if value == 0 or value > distance + 1:
+                            values[p] = distance + 1
+                            buckets[distance + 1].append(p)
+                    elif values[p] == 0:
+                        counts[p] -= 1
+                        if counts[p] == 0 and capture[p] != DRAWN:
+                            loss = max(distance + 1, capture[p])
+                            values[p] = loss + 2
+                            buckets[loss].append(p)
+        distance += 1
+    if any(buckets.values()):
+        raise ValueError(f"{table_name(kinds1, kinds2)}: a result is more than {MAX_DISTANCE} plies away")
+    return values
+
+def generate(kinds1, kinds2, directory=None, force=False, log=print):
+    """Solve and write the table of the signature and any missing table it needs; returns its path."""
+    if not canonical(kinds1, kinds2):
+        kinds1, kinds2 = kinds2, kinds1
+    directory = directory or TABLE_DIR
+    path = os.path.join(directory, table_name(kinds1, kinds2))
+    if os.path.exists(path) and not force:
+        return path
+    for sub in sub_signatures(kinds1, kinds2):
+        generate(*sub, directory=directory, log=log)
+    os.makedirs(directory, exist_ok=True)
+    start = time.time()
+    values = solve(kinds1, kinds2, directory)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(kinds1) + len(kinds2)))
+        f.write(values)
+    _tables.pop(path, None)
+    os.replace(tmp_path, path)
+    # The cached evaluations of these positions are heuristic scores: drop them
+    eval_cache.cache.clear()
+    if log:
+        wins = sum(1 for v in values if v & 1)
+        losses = sum(1 for v in values if v and not v & 1)
+        log(f"{table_name(kinds1, kinds2)}: {wins} won, {losses} lost positions, "
+            f"{time.time() - start:.1f} s")
+    return path
+
+def signatures(count1, count2):
+    """Stored signatures with count1 animals against count2."""
+    found = set()
+    for kinds1 in itertools.combinations(range(8, 0, -1), count1):
+        for kinds2 in itertools.combinations(range(8, 0, -1), count2):
+            found.add((kinds1, kinds2) if canonical(kinds1, kinds2) else (kinds2, kinds1))
+    return sorted(found, reverse=True)
+
+def parse_signature(text):
+    """'lion,tiger/elephant' -> ((7, 6), (8,)) (the animals of player 1, then of player 2)."""
+    sides = []
+    for side in text.split("/"):
+        kinds = tuple(sorted((Piece.hierarchy[name.strip()] for name in side.split(",")), reverse=True))
+        if len(set(kinds)) != len(kinds):
+            raise ValueError(f"{side}: each player has one animal of each kind")
+        sides.append(kinds)
+    if len(sides) != 2 or not sides[0] or not sides[1]:
+        raise ValueError(f"{text}: expected animals of player 1 / animals of player 2")
+    return sides[0], sides[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or list the endgame tablebases.")
+    parser.add_argument("--dir", default=TABLE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    gen = commands.add_parser("generate", help="solve tables: 2v1, 2v2, ... or lion,tiger/elephant")
+    gen.add_argument("material", nargs="+")
+    gen.add_argument("--force", action="store_true", help="solve again the tables that exist")
+    commands.add_parser("list", help="the tables in --dir")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        names = sorted(name for name in os.listdir(args.dir) if name.endswith(".tb")) if os.path.isdir(args.dir) else []
+        for name in names:
+            print(f"{name}: {os.path.getsize(os.path.join(args.dir, name))} bytes")
+        print(f"{len(names)} tables in {args.dir}")
+        return
+
+    for material in args.material:
+        if "v" in material and "/" not in material:
+            count1, count2 = (int(c) for c in material.split("v"))
+            if count1 + count2 > MAX_PIECES:
+                raise SystemExit(f"{material}: at most {MAX_PIECES} animals")
+            todo = signatures(count1, count2)
+        else:
+            todo = [parse_signature(material)]
+        for kinds1, kinds2 in todo:
+            generate(kinds1, kinds2, args.dir, force=args.force)
+
+if __name__ == "__main__":
+    main()
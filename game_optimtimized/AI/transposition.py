@@ -0,0 +1,87 @@
+from array import array
+from game_optimized.main_files.config import BOARD_COLS
+
+# Bound type of a stored value
+EMPTY, EXACT, LOWER, UPPER = range(4)
+
+NO_MOVE = 0xFFFF
+
+# key (8 bytes) + score (8) + move (2) + depth, bound, age (1 each)
+ENTRY_BYTES = 21
+
+def encode_move(move):
+    """(piece, x, y) -> from_cell * 64 + to_cell, NO_MOVE for None."""
+    if move is None:
+        return NO_MOVE
+    piece, x, y = move
+    return (piece.y * BOARD_COLS + piece.x) << 6 | (y * BOARD_COLS + x)
+
+def decode_move(game, code):
+    """Inverse of encode_move in the position of game; None if the from cell is empty."""
+    if code == NO_MOVE:
+        return None
+    piece = game.board[code >> 6]
+    if piece is None:
+        return None
+    to = code & 63
+    return piece, to % BOARD_COLS, to // BOARD_COLS
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table: a power of two of slots, indexed by the low bits of the
+    Zobrist key and stored in flat arrays, so its memory never grows after creation.
+
+    Each slot holds the full key, the search depth, the bound type (EXACT, LOWER, UPPER),
+    the value, the best move (encode_move) and the age of the search that wrote it.
+    Replacement: a slot is overwritten unless it holds a deeper result of the current search.
+    """
+
+    def __init__(self, size_mb=16):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """Reallocate (and empty) the table with at most size_mb megabytes of entries."""
+        slots = 1
+        while slots * 2 * ENTRY_BYTES <= size_mb * 2 ** 20:
+            slots *= 2
+        self.mask = slots - 1
+        self.keys = array("Q", [0]) * slots
+        self.scores = array("d", [0.0]) * slots
+        self.moves = array("H", [NO_MOVE]) * slots
+        self.depths = array("B", [0]) * slots
+        self.bounds = array("B", [EMPTY]) * slots
+        self.ages = array("B", [0]) * slots
+        self.age = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.bounds = array("B", [EMPTY]) * len(self.keys)
+        self.age = 0
+
+    def new_search(self):
+        """Start a new search: older entries become the first to be replaced."""
+        self.age = (self.age + 1) & 255
+
+    def probe(self, key):
+        """(depth, bound, score, move) stored for key, or None."""
+        i = key & self.mask
+        if self.bounds[i] == EMPTY or self.keys[i] != key:
+            return None
+        return self.depths[i], self.bounds[i], self.scores[i], self.moves[i]
+
+    def store(self, key, depth, bound, score, move=NO_MOVE):
+        i = key & self.mask
+        if self.bounds[i] != EMPTY and self.ages[i] == self.age and self.depths[i] > depth:
+            return
+        self.keys[i] = key
+        self.depths[i] = depth
+        self.bounds[i] = bound
+        self.scores[i] = score
+        self.moves[i] = move
+        self.ages[i] = self.age
+
+    def memory_bytes(self):
+        return len(self.keys) * ENTRY_BYTES
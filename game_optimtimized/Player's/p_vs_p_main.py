@@ -1,6 +1,7 @@
 import pygame
 import sys
 from game_optimized.main_files.config import *
+from game_optimized.main_files.display import SCREEN
 from game_optimized.main_files.game import Game
 
 def main():
@@ -0,0 +1,154 @@
+"""
+Legal move generation for many positions at once, with NumPy.
+
+A batch of positions is a boolean (or int8) array of shape (N, 16, 9, 7): one plane per
+animal, plane (player - 1) * 8 + (kind - 1), the same layout as BitboardState.boards.
+legal_move_masks() returns an (N, 16, 4, 9, 7) boolean array telling, for every animal
+and every direction of board.DIRECTIONS, whether it can move that way: one step, or a
+river jump for the lion and the tiger. DESTINATIONS gives the cell each move lands on.
+"""
+import numpy as np
+from game_optimized.main_files.config import BOARD_COLS, BOARD_ROWS
+from game_optimized.main_files.board import DIRECTIONS, WATER, IS_TRAP, LAIRS, JUMPS
+from game_optimized.main_files.piece import MOUSE, TIGER, LION, ELEPHANT
+
+CELLS = BOARD_COLS * BOARD_ROWS
+NONE = CELLS  # index of an always-empty extra column, used for "off the board"
+
+def _tables():
+    # step[s, d]: neighbour of s in direction d; jump[s, d]: landing cell of a river jump;
+    # path[s, d, :]: the water cells crossed by that jump (padded with NONE).
+    # Row NONE stands for a captured animal and leads nowhere.
+    step = np.full((CELLS + 1, 4), NONE, dtype=np.intp)
+    jump = np.full((CELLS + 1, 4), NONE, dtype=np.intp)
+    path = np.full((CELLS + 1, 4, 3), NONE, dtype=np.intp)
+    for s in range(CELLS):
+        x, y = s % BOARD_COLS, s // BOARD_COLS
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            if 0 <= x + dx < BOARD_COLS and 0 <= y + dy < BOARD_ROWS:
+                step[s, d] = (y + dy) * BOARD_COLS + x + dx
+        for (lx, ly), cells in JUMPS[s]:
+            d = DIRECTIONS.index(((lx > x) - (lx < x), (ly > y) - (ly < y)))
+            jump[s, d] = ly * BOARD_COLS + lx
+            path[s, d, :len(cells)] = cells
+    return step, jump, path
+
+STEP, JUMP, PATH = _tables()
+WATER_CELLS = np.array(WATER + [False])
+TRAP_CELLS = {player: np.array(IS_TRAP[player] + [False]) for player in (1, 2)}
+LAIR_CELLS = {player: np.arange(CELLS + 1) == y * BOARD_COLS + x for player, (x, y) in LAIRS.items()}
+# DESTINATIONS[kind][s, d]: where a move of that animal from s in direction d ends
+DESTINATIONS = {kind: np.where((kind in (LION, TIGER)) & (JUMP != NONE), JUMP, STEP) for kind in range(1, 9)}
+KINDS = np.arange(1, 9)
+JUMPERS = np.isin(KINDS, (LION, TIGER))
+
+def legal_move_masks(planes, turns=None):
+    """
+    Legal moves of every animal in a batch of positions, following Game.get_valid_moves.
+    If turns (N player numbers) is given, only the animals of the side to move keep moves.
+    """
+    planes = np.asarray(planes, dtype=bool)
+    n = planes.shape[0]
+    # Flatten the board and add the always-empty NONE column
+    flat = np.zeros((n, 16, CELLS + 1), dtype=bool)
+    flat[:, :, :CELLS] = planes.reshape(n, 16, CELLS)
+    # Every animal is on at most one cell: its index, and whether it is still on the board
+    present = flat.any(axis=2)
+    square = np.where(present, flat.argmax(axis=2), NONE)  # (n, 16)
+    # rank[player][n, cell]: kind of that player's animal on the cell, 0 if none
+    rank = {player: (flat[:, (player - 1) * 8:player * 8] * KINDS[None, :, None]).sum(axis=1)
+            for player in (1, 2)}
+    mice = flat[:, MOUSE - 1] | flat[:, 8 + MOUSE - 1]
+    rows = np.arange(n)[:, None, None]
+
+    ok = np.zeros((n, 16, 4), dtype=bool)
+    for player in (1, 2):
+        enemy = 3 - player
+        own = slice((player - 1) * 8, player * 8)
+        own_traps = TRAP_CELLS[player]
+        enemy_rank = rank[enemy][:, None, :]  # (n, 1, cells)
+        kinds = KINDS[:, None]                # (8, 1), one row per attacker kind
+        # Hierarchy: anything of lower or equal rank, the mouse also takes the elephant
+        capturable = (enemy_rank <= kinds) | ((kinds == MOUSE) & (enemy_rank == ELEPHANT))
+        capturable &= ~((kinds == ELEPHANT) & (enemy_rank == MOUSE) & ~own_traps)
+        # An enemy standing on one of our traps can be taken by anything
+        capturable |= own_traps
+        allowed = (~LAIR_CELLS[player] & (rank[player] == 0))[:, None, :] & ((enemy_rank == 0) | capturable)
+        allowed &= ~(WATER_CELLS & (kinds != MOUSE))  # only the mouse swims
+        allowed[:, :, NONE] = False                   # (n, 8, cells)
+
+        source = square[:, own]                       # (n, 8)
+        dest = np.where(JUMPERS[:, None] & (JUMP[source] != NONE), JUMP[source], STEP[source])  # (n, 8, 4)
+        moves = allowed[rows, np.arange(8)[None, :, None], dest]
+        # A river jump is blocked by a mouse on any water cell it crosses
+        blocked = mice[rows[..., None], PATH[source]].any(axis=3)
+        moves &= ~(JUMPERS[:, None] & blocked)
+        # A mouse in the water cannot capture on land
+        mouse = MOUSE - 1
+        moves[:, mouse] &= ~(WATER_CELLS[source[:, mouse, None]] & (rank[enemy][np.arange(n)[:, None], dest[:, mouse]] > 0)
+                             & ~WATER_CELLS[dest[:, mouse]])
+        ok[:, own] = moves & present[:, own, None]
+
+    if turns is not None:
+        turns = np.asarray(turns)
+        ok[turns == 1, 8:] = False
+        ok[turns == 2, :8] = False
+    # Scatter the per-animal results onto the animals' cells
+    masks = np.zeros((n, 16, 4, CELLS + 1), dtype=bool)
+    masks[np.arange(n)[:, None, None], np.arange(16)[None, :, None], np.arange(4)[None, None, :], square[:, :, None]] = ok
+    return masks[..., :CELLS].reshape(n, 16, 4, BOARD_ROWS, BOARD_COLS)
+
+def planes_from_games(games):
+    """Stack Game (or any object with .pieces) positions into an (N, 16, 9, 7) array."""
+    planes = np.zeros((len(games), 16, BOARD_ROWS, BOARD_COLS), dtype=bool)
+    for i, game in enumerate(games):
+        for p in game.pieces:
+            planes[i, (p.player - 1) * 8 + p.kind - 1, p.y, p.x] = True
+    return planes
+
+def move_list(masks, index):
+    """The moves of position index as ((x, y), (to_x, to_y)) pairs."""
+    moves = []
+    for plane, d, y, x in zip(*np.nonzero(masks[index])):
+        to = DESTINATIONS[plane % 8 + 1][y * BOARD_COLS + x, d]
+        moves.append(((int(x), int(y)), (int(to % BOARD_COLS), int(to // BOARD_COLS))))
+    return moves
+
+def cross_check(games):
+    """Compare legal_move_masks with Game.get_valid_moves; returns the number of mismatching positions."""
+    masks = legal_move_masks(planes_from_games(games))
+    bad = 0
+    for i, game in enumerate(games):
+        expected = sorted(((p.x, p.y), to) for p in game.pieces for to in game.get_valid_moves(p))
+        if sorted(move_list(masks, i)) != expected:
+            bad += 1
+    return bad
+
+if __name__ == "__main__":
+    import random
+    import time
+    from game_optimized.main_files.game import Game
+
+    # Random self-play positions, cross-checked against Game and timed
+    rng = random.Random(0)
+    games = []
+    while len(games) < 5000:
+        game = Game()
+        for _ in range(rng.randrange(1, 120)):
+            moves = game.legal_moves()
+            if game.winner is not None or not moves:
+                break
+            game.make_move(rng.choice(moves))
+        games.append(game)
+    print(f"Mismatches against Game.get_valid_moves: {cross_check(games)} / {len(games)}")
+
+    planes = planes_from_games(games)
+    start = time.time()
+    legal_move_masks(planes)
+    batch_time = time.time() - start
+    start = time.time()
+    for game in games:
+        for p in game.pieces:
+            game.get_valid_moves(p)
+    loop_time = time.time() - start
+    print(f"Batch: {len(games) / batch_time:.0f} positions/s, Game.get_valid_moves: {len(games) / loop_time:.0f} positions/s")
@@ -0,0 +1,201 @@
+from game_optimized.main_files.config import BOARD_COLS, BOARD_ROWS
+from game_optimized.main_files.board import TRAPS, LAIRS, WATER, NEIGHBOURS, JUMPS as CELL_JUMPS
+
+# Piece types, indexed so that type + 1 == Piece.kind == Piece.hierarchy[name]
+PIECE_NAMES = ["mouse", "cat", "dog", "wolf", "leopard", "tiger", "lion", "elephant"]
+MOUSE, CAT, DOG, WOLF, LEOPARD, TIGER, LION, ELEPHANT = range(8)
+PIECE_TYPES = {name: t for t, name in enumerate(PIECE_NAMES)}
+
+# Order in which Game.create_pieces lists each player's pieces, used by to_game()
+# so that a round trip keeps the same piece order (and therefore the same move order)
+GAME_ORDER = {
+    1: [TIGER, LION, ELEPHANT, DOG, WOLF, CAT, LEOPARD, MOUSE],
+    2: [LION, TIGER, ELEPHANT, DOG, WOLF, CAT, LEOPARD, MOUSE],
+}
+
+SQUARES = BOARD_COLS * BOARD_ROWS
+
+def square(x, y):
+    """Index of the cell (x, y) in a bitboard (row major, 0..62)."""
+    return y * BOARD_COLS + x
+
+def coords(sq):
+    """Inverse of square()."""
+    return sq % BOARD_COLS, sq // BOARD_COLS
+
+def bit(x, y):
+    return 1 << square(x, y)
+
+def _mask(cells):
+    return sum(1 << sq for sq in cells)
+
+# Bitboard views of the board tables
+FULL_MASK = (1 << SQUARES) - 1
+WATER_MASK = _mask(sq for sq in range(SQUARES) if WATER[sq])
+LAND_MASK = FULL_MASK & ~WATER_MASK
+TRAP_MASK = {player: _mask(square(x, y) for x, y in traps) for player, traps in TRAPS.items()}
+LAIR_MASK = {player: bit(x, y) for player, (x, y) in LAIRS.items()}
+STEPS = [[square(x, y) for x, y in cells] for cells in NEIGHBOURS]
+JUMPS = [[(square(*landing), _mask(path)) for landing, path in cell_jumps] for cell_jumps in CELL_JUMPS]
+
+
+class BitboardState:
+    """
+    Compact game state: one 63-bit integer per piece type per player.
+
+    boards[(player - 1) * 8 + type] holds the cell of that animal (at most one bit set),
+    occ[player] is the union of a player's boards. Move generation, captures and the
+    winner rules are the same as in Game.get_valid_moves / Game.move_piece.
+    """
+    __slots__ = ("boards", "occ", "turn", "winner")
+
+    def __init__(self, boards=None, turn=1, winner=None):
+        self.boards = list(boards) if boards is not None else [0] * 16
+        self.occ = [0, 0, 0]
+        for player in (1, 2):
+            for t in range(8):
+                self.occ[player] |= self.boards[(player - 1) * 8 + t]
+        self.turn = turn
+        self.winner = winner
+
+    @classmethod
+    def from_game(cls, game):
+        boards = [0] * 16
+        for p in game.pieces:
+            boards[(p.player - 1) * 8 + p.kind - 1] |= bit(p.x, p.y)
+        return cls(boards, game.turn, game.winner)
+
+    def to_game(self):
+        """Build a Game (with Piece objects) for the pygame front-ends."""
+        from game_optimized.main_files.game import Game
+        from game_optimized.main_files.piece import Piece
+        game = Game()
+        pieces = []
+        for player in (1, 2):
+            for t in GAME_ORDER[player]:
+                board = self.boards[(player - 1) * 8 + t]
+                if board:
+                    x, y = coords(board.bit_length() - 1)
+                    pieces.append(Piece(PIECE_NAMES[t], x, y, player))
+        game.pieces = pieces
+        game.turn = self.turn
+        game.winner = self.winner
+        return game
+
+    def copy(self):
+        state = BitboardState.__new__(BitboardState)
+        state.boards = self.boards[:]
+        state.occ = self.occ[:]
+        state.turn = self.turn
+        state.winner = self.winner
+        return state
+
+    def key(self):
+        """Hashable description of the position."""
+        return (self.turn, self.winner, tuple(self.boards))
+
+    def __eq__(self, other):
+        return isinstance(other, BitboardState) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def piece_at(self, sq):
+        """Return (player, type) of the animal on sq, or None."""
+        mask = 1 << sq
+        if not (self.occ[1] | self.occ[2]) & mask:
+            return None
+        for i, board in enumerate(self.boards):
+            if board & mask:
+                return i // 8 + 1, i % 8
+        return None
+
+    def _targets(self, player, t, sq):
+        # Mask of the cells this animal may end on (ignoring adjacency and jump paths)
+        base = (2 - player) * 8  # first board of the enemy
+        enemy = self.boards[base:base + 8]
+        own_traps = TRAP_MASK[player]
+        # Hierarchy: anything of lower or equal rank, the mouse also takes the elephant
+        capturable = 0
+        for r in range(t + 1):
+            capturable |= enemy[r]
+        if t == MOUSE:
+            capturable |= enemy[ELEPHANT]
+        elif t == ELEPHANT:
+            capturable &= ~(enemy[MOUSE] & ~own_traps)
+        # An enemy standing on one of our traps can be taken by anything
+        capturable |= self.occ[3 - player] & own_traps
+        # A mouse in the water cannot capture on land
+        if t == MOUSE and WATER_MASK >> sq & 1:
+            capturable &= WATER_MASK
+        allowed = FULL_MASK & ~LAIR_MASK[player] & ~self.occ[player] & (~self.occ[3 - player] | capturable)
+        if t != MOUSE:
+            allowed &= LAND_MASK
+        return allowed
+
+    def get_valid_moves(self, player, t, sq):
+        """Destination squares for the animal (player, t) standing on sq."""
+        allowed = self._targets(player, t, sq)
+        moves = [to for to in STEPS[sq] if allowed >> to & 1]
+        if t == LION or t == TIGER:
+            mice = self.boards[MOUSE] | self.boards[8 + MOUSE]
+            for landing, path in JUMPS[sq]:
+                if not path & mice and allowed >> landing & 1:
+                    moves.append(landing)
+        return moves
+
+    def legal_moves(self):
+        """All (from_sq, to_sq) moves of the side to move."""
+        moves = []
+        player = self.turn
+        base = (player - 1) * 8
+        for t in range(8):
+            board = self.boards[base + t]
+            if board:
+                sq = board.bit_length() - 1
+                moves.extend((sq, to) for to in self.get_valid_moves(player, t, sq))
+        return moves
+
+    def has_legal_move(self, player):
+        base = (player - 1) * 8
+        for t in range(8):
+            board = self.boards[base + t]
+            if board and self.get_valid_moves(player, t, board.bit_length() - 1):
+                return True
+        return False
+
+    def apply_move(self, move):
+        """
+        Play a legal (from_sq, to_sq) move in place, following Game.move_piece:
+        entering the enemy lair wins on the spot, otherwise the target is captured,
+        the turn passes and the game ends if the opponent has no animals or no moves.
+        """
+        from_sq, to_sq = move
+        player = self.turn
+        enemy = 3 - player
+        from_mask = 1 << from_sq
+        to_mask = 1 << to_sq
+        base = (player - 1) * 8
+        for i in range(base, base + 8):
+            if self.boards[i] & from_mask:
+                self.boards[i] ^= from_mask | to_mask
+                break
+        self.occ[player] ^= from_mask | to_mask
+
+        if to_mask & LAIR_MASK[enemy]:
+            self.winner = player
+            return
+
+        if self.occ[enemy] & to_mask:
+            enemy_base = (enemy - 1) * 8
+            for i in range(enemy_base, enemy_base + 8):
+                if self.boards[i] & to_mask:
+                    self.boards[i] = 0
+                    break
+            self.occ[enemy] ^= to_mask
+        self.turn = enemy
+
+        if not self.occ[enemy]:
+            self.winner = player
+        elif not self.has_legal_move(enemy):
+            self.winner = player
@@ -1,53 +1,43 @@
-import pygame
-from game_optimized.main_files.config import *
+from game_optimized.main_files.config import BOARD_COLS, BOARD_ROWS
 
-# used to highlight the possible plays 
-def darken_color(color, factor=0.7):
-    return tuple(max(int(c * factor), 0) for c in color)
+# The board layout never changes, so its geometry is computed once here.
+# Cells are indexed as y * BOARD_COLS + x.
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+TRAPS = {1: [(2, 8), (4, 8), (3, 7)], 2: [(2, 0), (4, 0), (3, 1)]}  # traps around each player's own lair
+LAIRS = {1: (3, 8), 2: (3, 0)}
 
-# func to determine if a cell is or is not watter
-def is_water(x, y):
+def _is_water(x, y):
     # Water region is columns 1-5 and rows 3-5 (0-indexed),
     # except positions D6, D5, D4 (col 3, rows 3,4,5) are exceptions.
     return (1 <= x <= 5 and 3 <= y <= 5) and not (x == 3 and y in [3, 4, 5])
 
-def draw_board(highlighted=[], traps_1=[], traps_2=[], lair_1=(), lair_2=()):
-    # Fill the entire screen with GREY -- outside the grid
-    SCREEN.fill(GREY)
-
-    # Fill each cell with the correspondent color
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            pos = (col, row)
-            if is_water(col, row):
-                base_color = BLUE
-            else:
-                base_color = WHITE 
+def _in_board(x, y):
+    return 0 <= x < BOARD_COLS and 0 <= y < BOARD_ROWS
 
-            if pos in traps_1 or pos in traps_2:
-                base_color = MAGENTA
-            if pos == lair_1 or pos == lair_2:
-                base_color = BLACK
+def _jumps(x, y):
+    # Lion/tiger river jumps from (x, y): (landing cell, water cells crossed) per direction
+    jumps = []
+    for dx, dy in DIRECTIONS:
+        path = []
+        cx, cy = x + dx, y + dy
+        while _in_board(cx, cy) and _is_water(cx, cy):
+            path.append(cy * BOARD_COLS + cx)
+            cx, cy = cx + dx, cy + dy
+        if path and _in_board(cx, cy):
+            jumps.append(((cx, cy), tuple(path)))
+    return jumps
 
-            if pos in highlighted and (pos != lair_1 and pos != lair_2): 
-                base_color = darken_color(base_color)
+CELLS = [(x, y) for y in range(BOARD_ROWS) for x in range(BOARD_COLS)]
+WATER = [_is_water(x, y) for x, y in CELLS]
+IS_TRAP = {player: [pos in traps for pos in CELLS] for player, traps in TRAPS.items()}
+NEIGHBOURS = [[(x + dx, y + dy) for dx, dy in DIRECTIONS if _in_board(x + dx, y + dy)] for x, y in CELLS]
+JUMPS = [_jumps(x, y) for x, y in CELLS]
+# Manhattan distance from every cell to each player's lair
+LAIR_DISTANCE = {player: [abs(x - lx) + abs(y - ly) for x, y in CELLS] for player, (lx, ly) in LAIRS.items()}
+# Land cells next to the river (column by column, the order the evaluations always used)
+RIVERBANK = [(x, y) for x in range(BOARD_COLS) for y in range(BOARD_ROWS)
+             if not _is_water(x, y) and any(_is_water(nx, ny) for nx, ny in NEIGHBOURS[y * BOARD_COLS + x])]
 
-            if pos in highlighted and (pos == lair_1 or pos == lair_2):
-                base_color = (52,53,60)     # changes the color from the lair when it is a possible move
-            
-            # drawing the actual grid, cell by cell
-            rect = pygame.Rect(MARGIN_LEFT + col * TILE_SIZE, MARGIN_TOP + row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-            pygame.draw.rect(SCREEN, base_color, rect)
-            pygame.draw.rect(SCREEN, BLACK, rect, 1)
-    
-    # render the text of the grid coordinates -- from 1 to 9 on the lines and from A to G on the collumns
-    font = pygame.font.Font(None, 24)
-    for i in range(BOARD_ROWS):
-        label = font.render(str(BOARD_ROWS - i), True, BLACK)
-        SCREEN.blit(label, (MARGIN_LEFT // 2 - label.get_width() // 2,
-                            MARGIN_TOP + i * TILE_SIZE + TILE_SIZE // 2 - label.get_height() // 2))
-    
-    for i, letter in enumerate("ABCDEFG"):
-        label = font.render(letter, True, BLACK)
-        SCREEN.blit(label, (MARGIN_LEFT + i * TILE_SIZE + TILE_SIZE // 2 - label.get_width() // 2,
-                            MARGIN_TOP // 2 - label.get_height() // 2))
+# func to determine if a cell is or is not watter
+def is_water(x, y):
+    return _in_board(x, y) and WATER[y * BOARD_COLS + x]
@@ -1,7 +1,6 @@
-import pygame
+# Board and screen dimensions. This module has no pygame dependency: the window
+# itself is opened by display.py, which only the visual front-ends import.
 
-# Initialize Pygame
-pygame.init()
 # screen dimensions and margins
 BOARD_COLS, BOARD_ROWS = 7, 9
 TILE_SIZE = 700 // BOARD_COLS  # Board area is 700x700
@@ -13,8 +12,6 @@ INFO_HEIGHT = 50  # Bottom info area height
 
 #set the display
 WIDTH, HEIGHT = MARGIN_LEFT * 2 + BOARD_WIDTH, MARGIN_TOP * 2 + BOARD_HEIGHT + INFO_HEIGHT
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Jungle Chess")
 
 # Colors
 WHITE   = (255, 255, 255)
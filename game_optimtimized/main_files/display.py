@@ -0,0 +1,7 @@
+import pygame
+from game_optimized.main_files.config import WIDTH, HEIGHT
+
+# Initialize Pygame and open the game window (imported by the visual front-ends only)
+pygame.init()
+SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+pygame.display.set_caption("Jungle Chess")
@@ -1,20 +1,55 @@
-import pygame
-from game_optimized.main_files.config import *
-from game_optimized.main_files.board import draw_board, is_water
-from game_optimized.main_files.piece import Piece
+from game_optimized.main_files.config import BOARD_COLS, BOARD_ROWS
+from game_optimized.main_files.board import TRAPS, LAIRS, WATER, IS_TRAP, NEIGHBOURS, JUMPS
+from game_optimized.main_files.piece import Piece, MOUSE, TIGER, LION, ELEPHANT
+from game_optimized.main_files.zobrist import PIECE_KEYS, TURN_KEY, WINNER_KEYS, pieces_hash
 
 class Game:
-    def __init__(self):
-        self.pieces = self.create_pieces()
+    def __init__(self, pieces=None):
+        self.pieces = self.create_pieces() if pieces is None else pieces
         self.selected_piece = None
         self.turn = 1  # Player 1 starts
-        self.traps_1 = [(2, 8), (4, 8), (3, 7)]
-        self.traps_2 = [(2, 0), (4, 0), (3, 1)]
-        self.lair_1 = (3, 8)  # Lair for Player 1
-        self.lair_2 = (3, 0)  # Lair for Player 2
+        self.traps_1 = TRAPS[1]
+        self.traps_2 = TRAPS[2]
+        self.lair_1 = LAIRS[1]  # Lair for Player 1
+        self.lair_2 = LAIRS[2]  # Lair for Player 2
         self.winner = None
         self.visualize = True
 
+    @property
+    def pieces(self):
+        return self._pieces
+
+    @pieces.setter
+    def pieces(self, pieces):
+        # Assigning a new piece list also rebuilds the occupancy grid and the Zobrist key
+        self._pieces = pieces
+        self.board = [None] * (BOARD_COLS * BOARD_ROWS)
+        for p in pieces:
+            self.board[p.y * BOARD_COLS + p.x] = p
+        self.pieces_hash = pieces_hash(pieces)
+        self._legal = None
+
+    @property
+    def hash(self):
+        """Zobrist key of the position: pieces (kept up to date by make_move), side to move and winner."""
+        h = self.pieces_hash ^ WINNER_KEYS[self.winner]
+        return h ^ TURN_KEY if self.turn == 2 else h
+
+    def legal_moves(self):
+        """
+        All (piece, x, y) moves of the player to move. The list is generated once per position
+        and shared by move_piece, the end-of-game check and the search, so it must not be modified.
+        """
+        cache = self._legal
+        if cache is None or cache[0] != self.turn:
+            moves = [(p, x, y) for p in self._pieces if p.player == self.turn for x, y in self.get_valid_moves(p)]
+            cache = self._legal = (self.turn, moves)
+        return cache[1]
+
+    def piece_at(self, x, y):
+        """Piece standing on (x, y), or None. (x, y) must be inside the board."""
+        return self.board[y * BOARD_COLS + x]
+
     def create_pieces(self):
         return [
             # Player 1 pieces
@@ -44,149 +79,138 @@ class Game:
             return False
 
         # Prevent moving into own lair
-        if piece.player == 1 and (x, y) == self.lair_1:
-            return False
-        if piece.player == 2 and (x, y) == self.lair_2:
+        if (x, y) == LAIRS[piece.player]:
             return False
 
         # Prevent other piece's then mouse entering the water
-        if piece.name != "mouse" and is_water(x, y):
+        square = y * BOARD_COLS + x
+        if piece.kind != MOUSE and WATER[square]:
             return False
 
         # Determine if the target cell is an enemy trap
-        enemy_trap = (x, y) in (self.traps_1 if piece.player == 1 else self.traps_2)
+        enemy_trap = IS_TRAP[piece.player][square]
 
         # Check if there is already a piece on the target cell
-        for p in self.pieces:
-            if p.x == x and p.y == y:
-                # Cannot move onto a cell occupied by a friendly piece
-                if p.player == piece.player:
-                    return False
-                # Elephant cannot capture a mouse
-                if piece.name == "elephant" and p.name == "mouse" and not enemy_trap:
-                    return False
-                # Mouse cannot leave water for land if starting from water, when there is another piece in the target cell
-                if piece.name == "mouse" and is_water(piece.x, piece.y) and not is_water(x, y):
-                    return False
-                # If the enemy piece is on an enemy trap, allow capture regardless of hierarchy
-                if enemy_trap:
-                    return True
-                # Otherwise, check hierarchy (mouse can capture elephant regardless)
-                return Piece.hierarchy[piece.name] >= Piece.hierarchy[p.name] or (piece.name == "mouse" and p.name == "elephant")
+        p = self.board[square]
+        if p is not None:
+            # Cannot move onto a cell occupied by a friendly piece
+            if p.player == piece.player:
+                return False
+            # Elephant cannot capture a mouse
+            if piece.kind == ELEPHANT and p.kind == MOUSE and not enemy_trap:
+                return False
+            # Mouse cannot leave water for land if starting from water, when there is another piece in the target cell
+            if piece.kind == MOUSE and WATER[piece.y * BOARD_COLS + piece.x] and not WATER[square]:
+                return False
+            # If the enemy piece is on an enemy trap, allow capture regardless of hierarchy
+            if enemy_trap:
+                return True
+            # Otherwise, check hierarchy (mouse can capture elephant regardless)
+            return piece.kind >= p.kind or (piece.kind == MOUSE and p.kind == ELEPHANT)
         return True
 
     def get_valid_moves(self, piece):
         if piece is None:
             return []
-        
-        moves = []
+
         # Standard adjacent moves
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            new_x, new_y = piece.x + dx, piece.y + dy
-            if self.is_valid_move(piece, new_x, new_y):
-                moves.append((new_x, new_y))
-
-        # Special case: Lion and Tiger jumping over water using dynamic jump length
-        if piece.name in ["lion", "tiger"]:
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                jump = 0
-                cur_x, cur_y = piece.x, piece.y
-                # Continue moving in the direction until a non-water tile is reached or out of bounds
-                while True:
-                    next_x = cur_x + dx
-                    next_y = cur_y + dy
-                    if not (0 <= next_x < BOARD_COLS and 0 <= next_y < BOARD_ROWS):
+        square = piece.y * BOARD_COLS + piece.x
+        moves = [(x, y) for x, y in NEIGHBOURS[square] if self.is_valid_move(piece, x, y)]
+
+        # Special case: Lion and Tiger jumping over water, unless a mouse is in the way
+        if piece.kind == LION or piece.kind == TIGER:
+            for landing, path in JUMPS[square]:
+                path_clear = True
+                for cell in path:
+                    p = self.board[cell]
+                    if p is not None and p.kind == MOUSE:
+                        path_clear = False
                         break
-                    if not is_water(next_x, next_y):
-                        break
-                    jump += 1
-                    cur_x, cur_y = next_x, next_y
-                if jump > 0:
-                    # Landing square: one tile beyond the water region
-                    landing_x = piece.x + dx * (jump + 1)
-                    landing_y = piece.y + dy * (jump + 1)
-                    if 0 <= landing_x < BOARD_COLS and 0 <= landing_y < BOARD_ROWS:
-                        # Check that no mouse is blocking any water tile in the jump path
-                        path_clear = True
-                        for i in range(1, jump + 1):
-                            check_x = piece.x + dx * i
-                            check_y = piece.y + dy * i
-                            for p in self.pieces:
-                                if p.x == check_x and p.y == check_y and p.name == "mouse":
-                                    path_clear = False
-                                    break
-                            if not path_clear:
-                                break
-                        if path_clear and self.is_valid_move(piece, landing_x, landing_y):
-                            moves.append((landing_x, landing_y))
+                if path_clear and self.is_valid_move(piece, landing[0], landing[1]):
+                    moves.append(landing)
         return moves
 
 
     def move_piece(self, piece, x, y, simulate=False):
-        if (x, y) in self.get_valid_moves(piece):
-            # Check victory by touching the enemy lair
-            if piece.player == 1 and (x, y) == self.lair_2:
-                piece.move(x, y)
-                if not simulate:
-                    draw_board([], self.traps_1, self.traps_2, self.lair_1, self.lair_2)
-                    for p in self.pieces:
-                        p.draw()
-                    pygame.display.flip()
-                    pygame.time.delay(1000)
-                self.winner = 1
-                return
-            elif piece.player == 2 and (x, y) == self.lair_1:
-                piece.move(x, y)
-                if not simulate:
-                    draw_board([], self.traps_1, self.traps_2, self.lair_1, self.lair_2)
-                    for p in self.pieces:
-                        p.draw()
-                    pygame.display.flip()
-                    pygame.time.delay(1000)
-                self.winner = 2
-                return
-            else:
-                # Regular move: capture enemy piece if present
-                for p in self.pieces:
-                    if p.x == x and p.y == y and p.player != piece.player:
-                        self.pieces.remove(p)
-                        break
-                piece.move(x, y)
-                self.turn = 3 - self.turn
-                self.selected_piece = None
-
-            # End game if one side has no animals left
-            if not any(p.player == (3 - piece.player) for p in self.pieces):
-                self.winner = piece.player
-            else:
-                # If the current player's pieces have no legal moves across all pieces, declare victory for the opponent
-                if not any(self.get_valid_moves(p) for p in self.pieces if p.player == self.turn):
-                    self.winner = 3 - self.turn
-
+        if piece.player == self.turn:
+            valid = (piece, x, y) in self.legal_moves()
+        else:
+            valid = (x, y) in self.get_valid_moves(piece)
+        if valid:
+            self.make_move((piece, x, y))
+            # Victory by touching the enemy lair: show the final position for a moment
+            if not simulate and self.visualize and (x, y) == (self.lair_2 if piece.player == 1 else self.lair_1):
+                from game_optimized.main_files.view import show_final_position
+                show_final_position(self)
+
+    # Used by minimax: play/undo a move in place instead of cloning the game
+    def make_move(self, move):
+        """
+        Play move = (piece, x, y) in place and return a token for unmake_move.
+        The move must be one of get_valid_moves(piece); the rules are the same as move_piece.
+        """
+        piece, x, y = move
+        board = self.board
+        captured, index = board[y * BOARD_COLS + x], -1
+        if captured is not None:
+            index = self._pieces.index(captured)
+        token = (piece, piece.x, piece.y, captured, index, self.turn, self.winner, self.selected_piece,
+                 self.pieces_hash, self._legal)
+        from_square = piece.y * BOARD_COLS + piece.x
+        to_square = y * BOARD_COLS + x
+        board[from_square] = None
+        board[to_square] = piece
+        keys = PIECE_KEYS[piece.player][piece.kind]
+        self.pieces_hash ^= keys[from_square] ^ keys[to_square]
+        self._legal = None
+
+        # Check victory by touching the enemy lair
+        if (piece.player == 1 and (x, y) == self.lair_2) or (piece.player == 2 and (x, y) == self.lair_1):
+            piece.move(x, y)
+            self.winner = piece.player
+            return token
+
+        # Regular move: capture enemy piece if present
+        if captured is not None:
+            del self._pieces[index]
+            self.pieces_hash ^= PIECE_KEYS[captured.player][captured.kind][to_square]
+        piece.move(x, y)
+        self.turn = 3 - self.turn
+        self.selected_piece = None
 
+        # End game if one side has no animals left
+        if not any(p.player == (3 - piece.player) for p in self.pieces):
+            self.winner = piece.player
+        else:
+            # If the current player's pieces have no legal moves across all pieces, declare victory for the opponent
+            # (the generated list stays cached for the next legal_moves call)
+            if not self.legal_moves():
+                self.winner = 3 - self.turn
+        return token
+
+    def unmake_move(self, token):
+        """Undo the move that returned token (moves must be undone in reverse order)."""
+        piece, old_x, old_y, captured, index, turn, winner, selected_piece, old_hash, legal = token
+        self.board[piece.y * BOARD_COLS + piece.x] = captured
+        self.board[old_y * BOARD_COLS + old_x] = piece
+        piece.move(old_x, old_y)
+        if captured is not None:
+            self._pieces.insert(index, captured)
+        self.turn = turn
+        self.winner = winner
+        self.selected_piece = selected_piece
+        self.pieces_hash = old_hash
+        self._legal = legal
 
     def draw(self):
         if not self.visualize:
             return
-        highlighted = self.get_valid_moves(self.selected_piece) if self.selected_piece else []
-        draw_board(highlighted, self.traps_1, self.traps_2, self.lair_1, self.lair_2)
-        for piece in self.pieces:
-            piece.draw()
-        font = pygame.font.Font(None, 36)
-        if self.winner in [1,2]:
-            msg = f"Player {self.winner} wins! Press R to reset."
-            text = font.render(msg, True, BLACK)
-            text_rect = text.get_rect(center=(WIDTH // 2, MARGIN_TOP + BOARD_HEIGHT // 2))
-        else:
-            msg = f"Next Player: {self.turn}"
-            text = font.render(msg, True, BLACK)
-            text_rect = text.get_rect(center=(WIDTH // 2, MARGIN_TOP + BOARD_HEIGHT + INFO_HEIGHT // 2))
-        SCREEN.blit(text, text_rect)
+        from game_optimized.main_files.view import draw_game
+        draw_game(self)
 
     # Used by minimax
     def clone_for_minimax(self):
-        new_game = Game()
-        new_game.pieces = [Piece(p.name, p.x, p.y, p.player) for p in self.pieces]
+        new_game = Game([p.copy() for p in self.pieces])
         new_game.winner = self.winner
         new_game.turn = self.turn
         new_game.traps_1 = self.traps_1
@@ -0,0 +1,183 @@
+"""
+Perft: count the leaf nodes of the move tree to a fixed depth.
+
+Used both as a benchmark of move generation (nodes per second) and as a correctness
+check: every backend must find the same counts as the Game rules, and the counts of
+the stored positions must not change unless the rules do.
+
+    python -m game_optimized.main_files.perft 4
+    python -m game_optimized.main_files.perft 3 --backend bitboard --position river --divide
+    python -m game_optimized.main_files.perft --check
+
+A finished game has no moves: once someone has won, the subtree counts 0 leaves
+(the position itself is only counted at depth 0).
+"""
+import argparse
+import time
+from game_optimized.main_files.game import Game
+from game_optimized.main_files.piece import Piece
+from game_optimized.main_files.bitboard import BitboardState, PIECE_NAMES, coords
+
+# Stored test positions: (pieces as (name, x, y, player), side to move).
+# None means the starting position of Game.create_pieces.
+POSITIONS = {
+    "start": None,
+    # Both sides developed, the lions and tigers next to the river
+    "middlegame": ([("tiger", 0, 5, 1), ("lion", 6, 6, 1), ("elephant", 0, 6, 1), ("dog", 4, 6, 1),
+                    ("wolf", 2, 6, 1), ("cat", 1, 7, 1), ("leopard", 3, 5, 1), ("mouse", 5, 4, 1),
+                    ("lion", 0, 3, 2), ("tiger", 6, 2, 2), ("elephant", 4, 3, 2), ("dog", 1, 1, 2),
+                    ("wolf", 3, 3, 2), ("cat", 5, 1, 2), ("leopard", 2, 2, 2), ("mouse", 1, 4, 2)], 1),
+    # River jumps: mice in the water block some of them
+    "river": ([("lion", 0, 6, 1), ("tiger", 3, 4, 1), ("mouse", 2, 4, 1), ("elephant", 3, 8, 1),
+               ("lion", 3, 2, 2), ("tiger", 6, 3, 2), ("mouse", 4, 5, 2), ("elephant", 6, 8, 2)], 1),
+    # Traps and lairs: pieces standing on traps, an attacker next to the lair
+    "traps": ([("elephant", 2, 8, 1), ("mouse", 3, 1, 1), ("dog", 4, 7, 1), ("cat", 2, 1, 1),
+               ("elephant", 3, 7, 2), ("mouse", 2, 7, 2), ("wolf", 2, 0, 2), ("lion", 4, 0, 2)], 2),
+}
+
+# Leaf counts at depth 0, 1, 2, ... (the same with the original clone-based move_piece), checked by --check
+EXPECTED = {
+    "start": [1, 24, 576, 12240, 260099],
+    "middlegame": [1, 22, 504, 10416, 227035],
+    "river": [1, 12, 155, 1923, 23907],
+    "traps": [1, 10, 85, 860, 7917],
+}
+
+def load_position(name):
+    """A new Game set up on one of the POSITIONS."""
+    game = Game()
+    game.visualize = False
+    position = POSITIONS[name]
+    if position is not None:
+        pieces, turn = position
+        game.pieces = [Piece(*piece) for piece in pieces]
+        game.turn = turn
+    return game
+
+
+def _label(name, player, x, y, to_x, to_y):
+    return f"{name}{player} ({x},{y})->({to_x},{to_y})"
+
+
+# Game backend: Piece objects, make_move / unmake_move
+def game_perft(game, depth):
+    if depth == 0:
+        return 1
+    if game.winner is not None:
+        return 0
+    moves = game.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in list(moves):
+        token = game.make_move(move)
+        nodes += game_perft(game, depth - 1)
+        game.unmake_move(token)
+    return nodes
+
+def game_divide(game, depth):
+    result = []
+    if game.winner is not None:
+        return result
+    for move in list(game.legal_moves()):
+        piece, x, y = move
+        label = _label(piece.name, piece.player, piece.x, piece.y, x, y)
+        token = game.make_move(move)
+        result.append((label, game_perft(game, depth - 1)))
+        game.unmake_move(token)
+    return result
+
+
+# Bitboard backend: BitboardState, copy / apply_move
+def bitboard_perft(state, depth):
+    if depth == 0:
+        return 1
+    if state.winner is not None:
+        return 0
+    moves = state.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        child = state.copy()
+        child.apply_move(move)
+        nodes += bitboard_perft(child, depth - 1)
+    return nodes
+
+def bitboard_divide(state, depth):
+    result = []
+    if state.winner is not None:
+        return result
+    for move in state.legal_moves():
+        player, t = state.piece_at(move[0])
+        label = _label(PIECE_NAMES[t], player, *coords(move[0]), *coords(move[1]))
+        child = state.copy()
+        child.apply_move(move)
+        result.append((label, bitboard_perft(child, depth - 1)))
+    return result
+
+
+# name: (build the backend's root from a Game, perft, divide)
+BACKENDS = {
+    "game": (lambda game: game, game_perft, game_divide),
+    "bitboard": (BitboardState.from_game, bitboard_perft, bitboard_divide),
+}
+
+def perft(depth, position="start", backend="game"):
+    """Number of leaf nodes depth plies below the position, with the chosen backend."""
+    setup, count, _ = BACKENDS[backend]
+    return count(setup(load_position(position)), depth)
+
+def divide(depth, position="start", backend="game"):
+    """perft split by root move: sorted (move, leaf count) pairs."""
+    if depth < 1:
+        raise ValueError("divide needs depth >= 1")
+    setup, _, split = BACKENDS[backend]
+    return sorted(split(setup(load_position(position)), depth))
+
+def check(max_depth=None):
+    """Compare every backend with EXPECTED; returns the number of wrong counts."""
+    errors = 0
+    for position, counts in EXPECTED.items():
+        for depth, expected in enumerate(counts):
+            if max_depth is not None and depth > max_depth:
+                break
+            for backend in BACKENDS:
+                nodes = perft(depth, position, backend)
+                status = "ok" if nodes == expected else f"FAILED (expected {expected})"
+                if nodes != expected:
+                    errors += 1
+                print(f"{position:<12} depth {depth}  {backend:<9} {nodes:>10}  {status}")
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Count the leaf nodes of the move tree (perft).")
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument("--position", choices=sorted(POSITIONS), default="start")
+    parser.add_argument("--backend", choices=sorted(BACKENDS) + ["all"], default="all")
+    parser.add_argument("--divide", action="store_true", help="print the leaf count under each root move")
+    parser.add_argument("--check", action="store_true", help="check the stored counts of every position")
+    args = parser.parse_args()
+
+    if args.check:
+        errors = check()
+        print("All counts match." if not errors else f"{errors} wrong counts.")
+        raise SystemExit(1 if errors else 0)
+
+    backends = sorted(BACKENDS) if args.backend == "all" else [args.backend]
+    for backend in backends:
+        start = time.time()
+        if args.divide:
+            split = divide(args.depth, args.position, backend)
+            for label, nodes in split:
+                print(f"  {label}: {nodes}")
+            nodes = sum(n for _, n in split)
+        else:
+            nodes = perft(args.depth, args.position, backend)
+        elapsed = time.time() - start
+        rate = nodes / elapsed if elapsed > 0 else 0
+        print(f"{backend}: perft({args.depth}) of {args.position} = {nodes}  "
+              f"({elapsed:.3f} s, {rate:.0f} nodes/s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,26 @@
-from game_optimized.main_files.images import images
-from game_optimized.main_files.config import *
+# Piece type codes. The code of an animal is also its rank (Piece.hierarchy).
+MOUSE, CAT, DOG, WOLF, LEOPARD, TIGER, LION, ELEPHANT = range(1, 9)
+PIECE_NAMES = [None, "mouse", "cat", "dog", "wolf", "leopard", "tiger", "lion", "elephant"]
 
 class Piece:
+    """
+    Lightweight record of an animal on the board: type code, position and owner.
+    It holds no sprite; drawing is done by view.draw_piece.
+    """
+    __slots__ = ("kind", "x", "y", "player")
     hierarchy = {"mouse": 1, "cat": 2, "dog": 3, "wolf": 4, "leopard": 5, "tiger": 6, "lion": 7, "elephant": 8}
     def __init__(self, name, x, y, player):
-        self.name = name
+        self.kind = Piece.hierarchy[name]
         self.x = x
         self.y = y
         self.player = player
-        self.image = images[self.name + f"_{player}"]
-    def draw(self):
-        SCREEN.blit(self.image, (MARGIN_LEFT + self.x * TILE_SIZE, MARGIN_TOP + self.y * TILE_SIZE))
+    @property
+    def name(self):
+        return PIECE_NAMES[self.kind]
+    def copy(self):
+        piece = Piece.__new__(Piece)
+        piece.kind, piece.x, piece.y, piece.player = self.kind, self.x, self.y, self.player
+        return piece
     def move(self, new_x, new_y):
         self.x = new_x
         self.y = new_y
-    def update_image(self):
-        """Call this method to refresh this piece's image after the global images dictionary is updated."""
-        from game_optimized.main_files.images import images
-        self.image = images[self.name + f"_{self.player}"]
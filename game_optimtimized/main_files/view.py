@@ -0,0 +1,82 @@
+import pygame
+from game_optimized.main_files.config import *
+from game_optimized.main_files.display import SCREEN
+from game_optimized.main_files.board import is_water
+from game_optimized.main_files import images
+
+# Drawing of the board, the pieces and the game state. Only the visual
+# front-ends import this module (through Game.draw); the rules and the AI don't need pygame.
+
+# used to highlight the possible plays 
+def darken_color(color, factor=0.7):
+    return tuple(max(int(c * factor), 0) for c in color)
+
+def draw_board(highlighted=[], traps_1=[], traps_2=[], lair_1=(), lair_2=()):
+    # Fill the entire screen with GREY -- outside the grid
+    SCREEN.fill(GREY)
+
+    # Fill each cell with the correspondent color
+    for row in range(BOARD_ROWS):
+        for col in range(BOARD_COLS):
+            pos = (col, row)
+            if is_water(col, row):
+                base_color = BLUE
+            else:
+                base_color = WHITE 
+
+            if pos in traps_1 or pos in traps_2:
+                base_color = MAGENTA
+            if pos == lair_1 or pos == lair_2:
+                base_color = BLACK
+
+            if pos in highlighted and (pos != lair_1 and pos != lair_2): 
+                base_color = darken_color(base_color)
+
+            if pos in highlighted and (pos == lair_1 or pos == lair_2):
+                base_color = (52,53,60)     # changes the color from the lair when it is a possible move
+            
+            # drawing the actual grid, cell by cell
+            rect = pygame.Rect(MARGIN_LEFT + col * TILE_SIZE, MARGIN_TOP + row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            pygame.draw.rect(SCREEN, base_color, rect)
+            pygame.draw.rect(SCREEN, BLACK, rect, 1)
+    
+    # render the text of the grid coordinates -- from 1 to 9 on the lines and from A to G on the collumns
+    font = pygame.font.Font(None, 24)
+    for i in range(BOARD_ROWS):
+        label = font.render(str(BOARD_ROWS - i), True, BLACK)
+        SCREEN.blit(label, (MARGIN_LEFT // 2 - label.get_width() // 2,
+                            MARGIN_TOP + i * TILE_SIZE + TILE_SIZE // 2 - label.get_height() // 2))
+    
+    for i, letter in enumerate("ABCDEFG"):
+        label = font.render(letter, True, BLACK)
+        SCREEN.blit(label, (MARGIN_LEFT + i * TILE_SIZE + TILE_SIZE // 2 - label.get_width() // 2,
+                            MARGIN_TOP // 2 - label.get_height() // 2))
+
+def draw_piece(piece):
+    # Sprites are looked up when drawing, so a change of image version applies right away
+    image = images.images[piece.name + f"_{piece.player}"]
+    SCREEN.blit(image, (MARGIN_LEFT + piece.x * TILE_SIZE, MARGIN_TOP + piece.y * TILE_SIZE))
+
+def draw_game(game):
+    highlighted = game.get_valid_moves(game.selected_piece) if game.selected_piece else []
+    draw_board(highlighted, game.traps_1, game.traps_2, game.lair_1, game.lair_2)
+    for piece in game.pieces:
+        draw_piece(piece)
+    font = pygame.font.Font(None, 36)
+    if game.winner in [1,2]:
+        msg = f"Player {game.winner} wins! Press R to reset."
+        text = font.render(msg, True, BLACK)
+        text_rect = text.get_rect(center=(WIDTH // 2, MARGIN_TOP + BOARD_HEIGHT // 2))
+    else:
+        msg = f"Next Player: {game.turn}"
+        text = font.render(msg, True, BLACK)
+        text_rect = text.get_rect(center=(WIDTH // 2, MARGIN_TOP + BOARD_HEIGHT + INFO_HEIGHT // 2))
+    SCREEN.blit(text, text_rect)
+
+def show_final_position(game):
+    # Shown for a second when a piece enters the enemy lair
+    draw_board([], game.traps_1, game.traps_2, game.lair_1, game.lair_2)
+    for p in game.pieces:
+        draw_piece(p)
+    pygame.display.flip()
+    pygame.time.delay(1000)
@@ -0,0 +1,32 @@
+import random
+from game_optimized.main_files.config import BOARD_COLS, BOARD_ROWS
+
+# Zobrist keys: one random 64-bit number per (animal, player, cell), XORed together
+# to get a position key that can be updated with a couple of XORs per move.
+# The seed is fixed so every process (and every run) produces the same keys.
+_rng = random.Random(0x4A554E474C45)
+
+def _key():
+    return _rng.getrandbits(64)
+
+# PIECE_KEYS[player][kind][cell], kind being the Piece type code (1..8, index 0 unused)
+PIECE_KEYS = {player: [None] + [[_key() for _ in range(BOARD_COLS * BOARD_ROWS)] for kind in range(1, 9)]
+              for player in (1, 2)}
+TURN_KEY = _key()  # XORed in when player 2 is to move
+WINNER_KEYS = {None: 0, 1: _key(), 2: _key()}
+# XORed into the search table keys: stored values are from the searching player's point of view
+SEARCHER_KEYS = {1: 0, 2: _key()}
+
+def pieces_hash(pieces):
+    """XOR of the keys of every piece on the board."""
+    h = 0
+    for p in pieces:
+        h ^= PIECE_KEYS[p.player][p.kind][p.y * BOARD_COLS + p.x]
+    return h
+
+def compute_hash(game):
+    """Full recomputation of the position key, for checking the incremental Game.hash."""
+    h = pieces_hash(game.pieces)
+    if game.turn == 2:
+        h ^= TURN_KEY
+    return h ^ WINNER_KEYS[game.winner]